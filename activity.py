@@ -0,0 +1,75 @@
+# activity.py
+"""
+Gestor de actividad de los enemigos.
+
+Sólo se simulan los enemigos que están dentro de la vista de la cámara
+ampliada con un margen; los demás duermen (no se mueven ni piensan) hasta
+que la zona activa los alcanza. Como la zona depende sólo de la cámara, y
+ésta del jugador, qué enemigos despiertan es determinista.
+
+El trabajo caro por enemigo (comprobar si ve al jugador con un raycast)
+se reparte entre ticks: en cada tick sólo piensa una porción de los
+enemigos activos, por turnos.
+
+Así el coste de cada tick depende de lo que hay cerca del jugador y no de
+cuántos enemigos tiene el nivel.
+"""
+
+# Píxeles alrededor de la vista de la cámara en los que los enemigos siguen activos
+ACTIVE_MARGIN = 256
+# Enemigos activos que comprueban si ven al jugador en cada tick
+THINK_SLICE = 8
+
+
+class EnemyActivity:
+    """
+    Decide qué enemigos se actualizan en cada tick. 'enemy_index' es la
+    SpriteGrid de los enemigos del nivel.
+    """
+    def __init__(self, enemy_index, margin=ACTIVE_MARGIN, think_slice=THINK_SLICE):
+        self.enemy_index = enemy_index
+        self.margin = margin
+        self.think_slice = think_slice
+        # Enemigos activos en el último tick, en el orden del grupo
+        self.active = []
+        self._think_cursor = 0
+
+    def update(self, camera, collision_index, target_rect=None, solid_grid=None):
+        """
+        Actualiza los enemigos cercanos a la cámara (ya movida este tick) y
+        los recoloca en la rejilla. Con 'target_rect' y 'solid_grid', una
+        porción de ellos actualiza 'sees_player' (ver Enemy.can_see).
+        """
+        index = self.enemy_index
+        # Enemigos añadidos o eliminados: la rejilla se rehace entera
+        if len(index) != len(index.group):
+            index.sync()
+
+        previous = self.active
+        active = index.query(camera.view_rect(self.margin))
+        for enemy in active:
+            enemy.update(collision_index)
+        index.sync_sprites(active)
+
+        # Los que se duermen dejan de interpolarse desde su último movimiento
+        if previous:
+            awake = set(active)
+            for enemy in previous:
+                if enemy not in awake:
+                    enemy.previous_topleft = enemy.rect.topleft
+        self.active = active
+
+        if target_rect is not None and solid_grid is not None:
+            self._think(target_rect, solid_grid)
+
+    def _think(self, target_rect, solid_grid):
+        """Comprueba la visión de los siguientes 'think_slice' enemigos activos (por turnos)."""
+        active = self.active
+        count = len(active)
+        if not count:
+            return
+        start = self._think_cursor % count
+        for i in range(min(self.think_slice, count)):
+            enemy = active[(start + i) % count]
+            enemy.sees_player = enemy.can_see(target_rect, solid_grid)
+        self._think_cursor = start + min(self.think_slice, count)
@@ -0,0 +1,244 @@
+# asset_bundle.py
+"""
+Paquete de imágenes ya convertidas.
+
+El paso de construcción (python asset_bundle.py) decodifica una vez los
+logos, el fondo del menú, las escenas de la intro, la hoja del jugador y
+los tilesets de los niveles, los escala al tamaño con el que se muestran
+y guarda sus píxeles en crudo en un único archivo con índice (BUNDLE_PATH).
+
+Al arrancar, el juego abre el paquete con mmap y crea cada superficie con
+pygame.image.frombuffer sobre sus bytes: sin decodificar PNG/JPEG ni
+escalar. asset_cache.py y level_cache.py lo consultan antes de cargar una
+imagen; si no está en el paquete, o su archivo original ha cambiado desde
+que se construyó, la cargan como siempre.
+
+Las claves son las de asset_cache (ruta, escala, conversión):
+  - "alpha" y "opaque": en BGRA, el formato de convert_alpha() en una
+    pantalla de 32 bits. Las "alpha" se usan tal cual, sin copiar.
+  - "raw": la imagen como la devuelve pygame.image.load (RGBA, o RGB si no
+    tiene canal alfa), que es lo que usa level_cache para los tilesets.
+
+Uso:
+    python asset_bundle.py [--output assets/assets.bundle]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+import pygame
+
+BUNDLE_PATH = os.environ.get("UNMEI_ASSET_BUNDLE", "assets/assets.bundle")
+
+_MAGIC = b"UGBUNDLE"
+_VERSION = 1
+_HEADER = struct.Struct("<8sII")   # magia, versión, bytes del índice
+_ALIGN = 16
+
+
+def _file_sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def bundle_key(path, scale=None, conversion="raw"):
+    return (os.path.normpath(path), scale, conversion)
+
+
+class AssetBundle:
+    """
+    Un paquete abierto. El mmap es una copia privada: modificar los píxeles
+    de una superficie no toca el archivo.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, index_size = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("%s no es un paquete de recursos válido" % path)
+        index = json.loads(self._map[_HEADER.size:_HEADER.size + index_size].decode("utf-8"))
+        # Los desplazamientos del índice cuentan desde el final del índice
+        self._data_start = _HEADER.size + index_size
+        self.entries = {}
+        for entry in index["entries"]:
+            source, scale, conversion = entry["key"]
+            scale = tuple(scale) if isinstance(scale, list) else scale
+            self.entries[bundle_key(source, scale, conversion)] = entry
+        # Ruta original -> {"signature": [mtime_ns, bytes, sha1], "size": [ancho, alto]}
+        self.sources = index["sources"]
+        self._fresh = {}
+
+    def _is_fresh(self, source):
+        """Si el archivo original sigue igual que al construir el paquete (mismo criterio que level_cache)."""
+        fresh = self._fresh.get(source)
+        if fresh is None:
+            mtime_ns, size, sha1 = self.sources[source]["signature"]
+            try:
+                stat = os.stat(source)
+            except OSError:
+                # Sin el original (p. ej. en el ejecutable) el paquete es la única copia
+                fresh = True
+            else:
+                fresh = stat.st_size == size and (stat.st_mtime_ns == mtime_ns or _file_sha1(source) == sha1)
+            self._fresh[source] = fresh
+        return fresh
+
+    def surface(self, key):
+        """Superficie sobre los bytes del paquete, o None si no está o el original ha cambiado."""
+        entry = self.entries.get(key)
+        if entry is None or not self._is_fresh(key[0]):
+            return None
+        start = self._data_start + entry["offset"]
+        view = memoryview(self._map)[start:start + entry["length"]]
+        return pygame.image.frombuffer(view, tuple(entry["size"]), entry["format"])
+
+    def source_size(self, path):
+        """Tamaño de la imagen original, sin escalar, o None."""
+        source = os.path.normpath(path)
+        if source not in self.sources or not self._is_fresh(source):
+            return None
+        return tuple(self.sources[source]["size"])
+
+
+_bundle = None
+_opened = False
+_lock = threading.Lock()
+
+
+def get_bundle():
+    """El paquete de BUNDLE_PATH (se abre la primera vez), o None si no hay."""
+    global _bundle, _opened
+    if not _opened:
+        with _lock:
+            if not _opened:
+                try:
+                    _bundle = AssetBundle(BUNDLE_PATH)
+                except (OSError, ValueError):
+                    _bundle = None
+                _opened = True
+    return _bundle
+
+
+def load(key):
+    """Superficie del paquete para 'key' (ver bundle_key), o None."""
+    bundle = get_bundle()
+    return bundle.surface(key) if bundle is not None else None
+
+
+def source_size(path):
+    bundle = get_bundle()
+    return bundle.source_size(path) if bundle is not None else None
+
+
+# ========================
+#   CONSTRUCCIÓN
+# ========================
+
+def bundled_images():
+    """
+    Las claves que van en el paquete: las imágenes que carga el juego, con
+    la escala y la conversión con las que las pide.
+    """
+    # Importados aquí: main importa asset_cache, que a su vez usa este módulo
+    from intro import INTRO_SCENES
+    from level_cache import load_level
+    from main import BACKGROUND_IMAGE, LOGO_1, LOGO_2, SCREEN_SIZE, logo_display_size
+    from player import PLAYER_SHEET
+    from spritesheet import sheet_image_path
+
+    keys = []
+    for logo in (LOGO_1, LOGO_2):
+        size = pygame.image.load(logo).get_size()
+        keys.append(bundle_key(logo, logo_display_size(size, SCREEN_SIZE), "alpha"))
+    keys.append(bundle_key(BACKGROUND_IMAGE, SCREEN_SIZE, "opaque"))
+    for scene in INTRO_SCENES:
+        if os.path.exists(scene["image"]):
+            keys.append(bundle_key(scene["image"], SCREEN_SIZE, "opaque"))
+    keys.append(bundle_key(sheet_image_path(PLAYER_SHEET), None, "alpha"))
+
+    tilesets = set()
+    for tmx_path in sorted(glob.glob("assets/tilemaps/*.tmx")):
+        level = load_level(tmx_path, load_images=False)
+        tilesets.update(tile[0] for tile in level.tiles if tile is not None)
+    keys.extend(bundle_key(source) for source in sorted(tilesets))
+    return keys
+
+
+def _pixels(key, image):
+    """(formato, tamaño, bytes) de la imagen tal como se guarda en el paquete, o None si no se puede guardar."""
+    path, scale, conversion = key
+    if scale is not None:
+        image = pygame.transform.scale(image, scale)
+    if conversion == "raw":
+        # Las imágenes con color clave no caben en un formato de frombuffer
+        if image.get_colorkey() is not None:
+            return None
+        fmt = "RGBA" if image.get_flags() & pygame.SRCALPHA else "RGB"
+    else:
+        fmt = "BGRA"
+    return fmt, image.get_size(), pygame.image.tobytes(image, fmt)
+
+
+def build_bundle(output=BUNDLE_PATH, keys=None):
+    """Escribe el paquete en 'output' y devuelve su índice."""
+    if keys is None:
+        keys = bundled_images()
+    entries = []
+    sources = {}
+    blobs = []
+    offset = 0
+    originals = {}
+    for key in keys:
+        path = key[0]
+        if path not in originals:
+            originals[path] = pygame.image.load(path)
+            stat = os.stat(path)
+            sources[path] = {"signature": [stat.st_mtime_ns, stat.st_size, _file_sha1(path)],
+                             "size": list(originals[path].get_size())}
+        pixels = _pixels(key, originals[path])
+        if pixels is None:
+            continue
+        fmt, size, data = pixels
+        entries.append({"key": [path, key[1], key[2]], "format": fmt, "size": list(size),
+                        "offset": offset, "length": len(data)})
+        padding = -len(data) % _ALIGN
+        blobs.append(data + b"\0" * padding)
+        offset += len(data) + padding
+
+    index = {"entries": entries, "sources": sources}
+    index_data = json.dumps(index).encode("utf-8")
+    # Se rellena con espacios para que los datos empiecen alineados
+    index_data += b" " * (-(_HEADER.size + len(index_data)) % _ALIGN)
+
+    tmp_path = output + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(index_data)))
+        f.write(index_data)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, output)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye el paquete de imágenes ya convertidas.")
+    parser.add_argument("--output", default=BUNDLE_PATH, help="archivo de salida")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    index = build_bundle(args.output)
+    pygame.quit()
+    data = sum(entry["length"] for entry in index["entries"])
+    print("%d imágenes de %d archivos, %.1f MiB -> %s"
+          % (len(index["entries"]), len(index["sources"]), data / (1024 * 1024), args.output))
+
+
+if __name__ == "__main__":
+    main()
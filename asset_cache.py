@@ -0,0 +1,237 @@
+# asset_cache.py
+"""
+Caché compartida de imágenes, hojas de sprites y fuentes.
+
+Cada recurso se identifica por (ruta, escala, conversión) y se carga una
+sola vez: las siguientes peticiones devuelven el mismo objeto. Quien lo
+pide con load_*() lo retiene hasta llamar a release(); los recursos sin
+nadie que los retenga se quedan en memoria mientras quepan en
+ASSET_MEMORY_BUDGET y, si no, se descartan empezando por el que hace más
+tiempo que no se usa.
+
+Las imágenes se buscan antes en el paquete de asset_bundle.py, donde ya
+están convertidas y escaladas; si no están, se decodifican del archivo.
+
+Los recursos son compartidos: quien vaya a modificar uno (set_alpha,
+fill...) debe dejarlo como estaba o trabajar sobre una copia.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import pygame
+
+import asset_bundle
+import render_backend
+from spritesheet import SpriteSheet
+
+# Bytes de píxeles que pueden ocupar los recursos que nadie retiene
+ASSET_MEMORY_BUDGET = 64 * 1024 * 1024
+# Si se define, main.py muestra las estadísticas de la caché al salir
+SHOW_ASSET_STATS = os.environ.get("UNMEI_ASSET_STATS", "0") != "0"
+
+
+def _size_of(value):
+    """Bytes de píxeles de una superficie o una hoja de sprites (las fuentes cuentan 0)."""
+    if isinstance(value, pygame.Surface):
+        return value.get_pitch() * value.get_height()
+    if isinstance(value, SpriteSheet):
+        return value.nbytes
+    return 0
+
+
+class AssetCache:
+    """Caché LRU con contador de referencias. Se puede usar desde varios hilos."""
+    def __init__(self, budget=ASSET_MEMORY_BUDGET):
+        self.budget = budget
+        # clave -> [recurso, bytes, referencias], del menos al más recientemente usado
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, key, loader):
+        """Devuelve el recurso de 'key' (cargándolo con loader() si no está) y lo retiene."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                entry[2] += 1
+                self._entries.move_to_end(key)
+                return entry[0]
+            self.misses += 1
+        # Se carga sin bloquear la caché; si otro hilo cargó lo mismo entretanto, se usa lo suyo
+        value = loader()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[2] += 1
+                self._entries.move_to_end(key)
+                return entry[0]
+            size = _size_of(value)
+            self._entries[key] = [value, size, 1]
+            self.bytes += size
+            self._evict()
+            return value
+
+    def release(self, key):
+        """Deja de retener el recurso de 'key'."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > 0:
+                entry[2] -= 1
+                if entry[2] == 0:
+                    self._evict()
+
+    def _evict(self):
+        if self.bytes <= self.budget:
+            return
+        for key in [k for k, e in self._entries.items() if e[2] == 0]:
+            self.bytes -= self._entries.pop(key)[1]
+            self.evictions += 1
+            if self.bytes <= self.budget:
+                return
+
+    def clear(self):
+        """Olvida todo (p. ej. si cambia el formato de la pantalla y hay que volver a convertir)."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "retained": sum(1 for e in self._entries.values() if e[2] > 0),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+cache = AssetCache()
+
+
+def _scale_key(scale):
+    return None if scale in (None, 1) else scale
+
+
+def _conversion(alpha):
+    return "alpha" if alpha else "opaque"
+
+
+def _scaled(image, scale):
+    if scale is None:
+        return image
+    if isinstance(scale, tuple):
+        size = scale
+    else:
+        width, height = image.get_size()
+        size = (int(width * scale), int(height * scale))
+    return pygame.transform.scale(image, size)
+
+
+def _bundled(key, alpha):
+    """La imagen de 'key' sacada del paquete y lista para usar, o None."""
+    image = asset_bundle.load(key)
+    if image is None:
+        return None
+    screen = pygame.display.get_surface()
+    if alpha and (screen is None or screen.get_bitsize() == 32):
+        # Ya está en el formato de convert_alpha(): se usa sin copiar
+        return image
+    return render_backend.convert(image, alpha=alpha)
+
+
+def _load_original(path, alpha):
+    key = image_key(path, alpha=alpha)
+    image = _bundled(key, alpha)
+    if image is None:
+        image = render_backend.convert(pygame.image.load(path), alpha=alpha)
+    return image
+
+
+def image_key(path, scale=None, alpha=False):
+    return (os.path.normpath(path), _scale_key(scale), _conversion(alpha))
+
+
+def load_image(path, scale=None, alpha=False):
+    """
+    Imagen convertida al formato de la pantalla (render_backend.convert) y,
+    si se pide, escalada: 'scale' es un factor o un tamaño (ancho, alto).
+    Hay que liberarla con release(image_key(path, scale, alpha)).
+    """
+    key = image_key(path, scale, alpha)
+
+    def loader():
+        if key[1] is None:
+            return _load_original(path, alpha)
+        image = _bundled(key, alpha)
+        if image is not None:
+            return image
+        # La versión escalada se hace a partir de la original, que también queda en caché
+        original = load_image(path, alpha=alpha)
+        try:
+            return _scaled(original, key[1])
+        finally:
+            release(image_key(path, alpha=alpha))
+
+    return cache.acquire(key, loader)
+
+
+def image_size(path):
+    """Tamaño original de una imagen, sin cargarla si el paquete lo sabe."""
+    size = asset_bundle.source_size(path)
+    if size is None:
+        key = image_key(path, alpha=True)
+        size = load_image(path, alpha=True).get_size()
+        release(key)
+    return size
+
+
+def sheet_key(meta_path, alpha=True):
+    return (os.path.normpath(meta_path), None, _conversion(alpha) + "-sheet")
+
+
+def load_sheet(meta_path, alpha=True):
+    """
+    Hoja de sprites con sus animaciones (spritesheet.SpriteSheet). Se libera
+    con release(sheet_key(meta_path, alpha)).
+    """
+    return cache.acquire(sheet_key(meta_path, alpha), lambda: SpriteSheet(meta_path, alpha, _load_original))
+
+
+def font_key(name, size):
+    return (name, size, "font")
+
+
+def load_font(name, size):
+    """
+    pygame.font.Font(name, size) compartida. Las fuentes no se retienen: no
+    cuentan para el presupuesto, así que no se descartan y no hay que liberarlas.
+    """
+    key = font_key(name, size)
+    font = cache.acquire(key, lambda: pygame.font.Font(name, size))
+    cache.release(key)
+    return font
+
+
+def release(key):
+    cache.release(key)
+
+
+def stats():
+    return cache.stats()
+
+
+def format_stats():
+    s = cache.stats()
+    total = s["hits"] + s["misses"]
+    ratio = s["hits"] / total * 100 if total else 0.0
+    return ("Caché de recursos: %d aciertos, %d fallos (%.0f%% aciertos), %d descartes; "
+            "%d recursos (%d retenidos), %.1f MiB"
+            % (s["hits"], s["misses"], ratio, s["evictions"], s["entries"], s["retained"],
+               s["bytes"] / (1024 * 1024)))
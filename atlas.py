@@ -0,0 +1,82 @@
+# atlas.py
+"""
+Atlas de texturas: empaqueta muchas imágenes pequeñas (tiles) en unas pocas
+superficies grandes. Cada imagen queda identificada por (página, rect) y se
+dibuja con blit(página, destino, rect) o en lote con Surface.blits.
+"""
+import pygame
+
+# Tamaño máximo (en píxeles) de cada página del atlas
+ATLAS_SIZE = 1024
+
+
+class TextureAtlas:
+    """
+    Empaquetador por estantes (shelf packing): las imágenes se colocan de
+    izquierda a derecha y, cuando no caben, se abre un estante nuevo debajo.
+
+    Con alpha=False las páginas se convierten sin canal alfa, así que sólo
+    deben añadirse imágenes totalmente opacas.
+    """
+    def __init__(self, alpha=True, page_size=ATLAS_SIZE):
+        self.alpha = alpha
+        self.page_size = page_size
+        self.pages = []
+        # Posición libre en la página actual y alto del estante actual
+        self._x = 0
+        self._y = 0
+        self._shelf_height = 0
+        self._used_height = []
+
+    def _new_page(self):
+        flags = pygame.SRCALPHA if self.alpha else 0
+        self.pages.append(pygame.Surface((self.page_size, self.page_size), flags))
+        self._used_height.append(0)
+        self._x = self._y = self._shelf_height = 0
+
+    def add(self, image):
+        """Copia la imagen en el atlas y devuelve (índice_página, rect)."""
+        width, height = image.get_size()
+        if width > self.page_size or height > self.page_size:
+            raise ValueError("La imagen (%dx%d) no cabe en una página del atlas" % (width, height))
+
+        if not self.pages:
+            self._new_page()
+        if self._x + width > self.page_size:
+            # Nuevo estante
+            self._x = 0
+            self._y += self._shelf_height
+            self._shelf_height = 0
+        if self._y + height > self.page_size:
+            self._new_page()
+
+        rect = pygame.Rect(self._x, self._y, width, height)
+        page_index = len(self.pages) - 1
+        if self.alpha:
+            # Sobre una página vacía (0, 0, 0, 0) el máximo copia los píxeles tal cual,
+            # sin la mezcla alfa que alteraría el color de los bordes semitransparentes
+            self.pages[page_index].blit(image, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        else:
+            self.pages[page_index].blit(image, rect)
+        self._x += width
+        self._shelf_height = max(self._shelf_height, height)
+        self._used_height[page_index] = max(self._used_height[page_index], rect.bottom)
+        return page_index, rect
+
+    def finalize(self):
+        """
+        Recorta cada página a la altura usada y la pasa al formato de pantalla.
+        Después de esto no se deben añadir más imágenes.
+        """
+        display_ready = pygame.display.get_surface() is not None
+        for i, page in enumerate(self.pages):
+            used = pygame.Rect(0, 0, self.page_size, max(1, self._used_height[i]))
+            page = page.subsurface(used).copy()
+            if display_ready:
+                page = page.convert_alpha() if self.alpha else page.convert()
+            self.pages[i] = page
+        return self.pages
+
+    @property
+    def memory_used(self):
+        return sum(p.get_width() * p.get_height() * p.get_bytesize() for p in self.pages)
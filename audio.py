@@ -0,0 +1,162 @@
+# audio.py
+"""
+Música con transiciones que no bloquean.
+
+MusicManager lleva las transiciones de pygame.mixer.music como una
+máquina de estados que avanza con el reloj (pygame.time.get_ticks): cada
+bucle de pantalla llama a update() una vez por frame y el volumen se
+calcula según el tiempo pasado, así que da igual a cuántos fps vaya.
+
+pygame.mixer.music sólo reproduce una pista a la vez, así que cambiar de
+pista es bajar la actual hasta el silencio y subir la nueva desde cero
+(como hacía el antiguo main.fade_music, pero sin pygame.time.delay).
+
+El volumen que elige el jugador (volume, muted) es independiente de la
+transición: el volumen real es volume * nivel de la transición.
+"""
+from collections import deque
+
+import pygame
+
+# Volumen inicial de la música (0-1)
+MUSIC_VOLUME = 0.5
+# Duración por defecto de cada mitad de una transición, en ms
+FADE_MS = 2000
+
+_IDLE = "idle"          # Sin música
+_FADE_IN = "fade_in"
+_PLAYING = "playing"
+_FADE_OUT = "fade_out"  # Bajando la pista actual para poner _next
+
+
+class MusicManager:
+    def __init__(self, volume=MUSIC_VOLUME):
+        self.volume = volume
+        self.muted = False
+        self.track = None
+        self.state = _IDLE
+        # Nivel de la transición (0-1) y rampa en curso: (desde, hasta, inicio_ms, duración_ms)
+        self._level = 0.0
+        self._ramp = None
+        # Pista que sonará al terminar de bajar la actual: (ruta, fade_ms, loops)
+        self._next = None
+        # Pistas que sonarán cuando termine la actual
+        self._queue = deque()
+
+    @staticmethod
+    def _ready():
+        return pygame.mixer.get_init() is not None
+
+    def play(self, path, fade_ms=FADE_MS, loops=-1):
+        """
+        Cambia a 'path': baja la pista actual en fade_ms y sube la nueva en
+        otros fade_ms. Si 'path' ya es la pista que suena, sigue sonando (y,
+        si se estaba bajando, vuelve a subir).
+        """
+        if path == self.track and self.state != _IDLE:
+            self._next = None
+            if self.state == _FADE_OUT:
+                self.state = _FADE_IN
+                self._fade_to(1.0, fade_ms * (1.0 - self._level))
+            self.update()
+            return
+        self._next = (path, fade_ms, loops)
+        if self.state == _IDLE or self._level <= 0:
+            self._start_next()
+        else:
+            # Si ya estaba a medio subir o bajar, se baja desde el nivel actual
+            self.state = _FADE_OUT
+            self._fade_to(0.0, fade_ms * self._level)
+        self.update()
+
+    def queue(self, path, fade_ms=FADE_MS, loops=0):
+        """Pone 'path' cuando la pista actual termine (si no hay música, ahora)."""
+        self._queue.append((path, fade_ms, loops))
+        if self.state == _IDLE:
+            self._next = self._queue.popleft()
+            self._start_next()
+            self.update()
+
+    def stop(self, fade_ms=FADE_MS):
+        """Baja la música hasta el silencio y la para."""
+        self._queue.clear()
+        self._next = None
+        if self.state == _IDLE:
+            return
+        self.state = _FADE_OUT
+        self._fade_to(0.0, fade_ms * self._level)
+        self.update()
+
+    def set_volume(self, volume):
+        self.volume = max(0.0, min(1.0, volume))
+        self._apply()
+
+    def set_muted(self, muted):
+        self.muted = muted
+        self._apply()
+
+    def toggle_mute(self):
+        self.set_muted(not self.muted)
+
+    @property
+    def busy(self):
+        """Si hay una transición en curso."""
+        return self._ramp is not None
+
+    def update(self):
+        """Avanza la transición en curso y pasa a la siguiente pista de la cola. Una vez por frame."""
+        while self._ramp is not None:
+            start_level, target, start_ms, duration = self._ramp
+            elapsed = pygame.time.get_ticks() - start_ms
+            t = 1.0 if duration <= 0 else min(1.0, elapsed / duration)
+            self._level = start_level + (target - start_level) * t
+            if t < 1.0:
+                break
+            self._ramp = None
+            if self.state == _FADE_OUT:
+                # Puede empezar otra rampa (la subida de la siguiente pista)
+                self._start_next()
+            else:
+                self.state = _PLAYING
+        if self.state == _PLAYING and self._ready() and not pygame.mixer.music.get_busy():
+            # La pista terminó (sólo pasa con las que no se repiten)
+            if self._queue:
+                self._next = self._queue.popleft()
+                self._start_next()
+            else:
+                self.track = None
+                self.state = _IDLE
+        self._apply()
+
+    def _fade_to(self, target, duration):
+        self._ramp = (self._level, target, pygame.time.get_ticks(), duration)
+
+    def _start_next(self):
+        self._level = 0.0
+        if self._next is None:
+            if self._ready():
+                pygame.mixer.music.stop()
+            self.track = None
+            self.state = _IDLE
+            self._ramp = None
+            return
+        path, fade_ms, loops = self._next
+        self._next = None
+        self.track = path
+        self.state = _FADE_IN
+        if self._ready():
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.set_volume(0)
+            pygame.mixer.music.play(loops)
+        self._fade_to(1.0, fade_ms)
+
+    def _apply(self):
+        if self._ready():
+            pygame.mixer.music.set_volume(0.0 if self.muted else self.volume * self._level)
+
+
+music = MusicManager()
+
+
+def update():
+    music.update()
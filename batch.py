@@ -0,0 +1,171 @@
+# batch.py
+"""
+Lanza muchas simulaciones sin ventana (headless.run_headless) repartidas
+entre varios procesos y junta sus métricas en un único informe.
+
+Cada trabajo es un diccionario:
+    {"map": "assets/tilemaps/level1_1.tmx",   # obligatorio
+     "ticks": 3600,
+     "script": "guion.txt",                   # entrada (input_source.ScriptedInput)
+     "until_end": False,                      # parar al llegar al final del nivel
+     "player_spawn": [x, y],                  # punto de inicio del jugador
+     "enemy_speed": 1.0,                      # multiplicadores para los enemigos
+     "enemy_health": 1.0}
+
+Los mapas se cargan una sola vez en el proceso principal antes de crear
+los procesos: con fork los heredan sin volver a leerlos y, si no, cada
+proceso los carga una vez desde la caché compilada (level_cache.py).
+
+Uso:
+    python batch.py --jobs trabajos.json [--workers N] [--json informe.json]
+    python batch.py --maps a.tmx b.tmx [--scripts g1.txt g2.txt] [--repeat K] [--ticks N]
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# Sin esto SDL captura SIGTERM y Pool.terminate() no puede parar los procesos
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+import argparse
+import json
+import multiprocessing
+import time
+
+import pygame
+
+from game_session import build_level_state
+from headless import DEFAULT_MAP, DEFAULT_TICKS, run_headless
+from input_source import NullInput, ScriptedInput
+from tilemap import load_map
+
+# Niveles ya cargados (ruta -> LevelData), compartidos por todos los trabajos de un proceso
+_levels = {}
+
+
+def _load_levels(paths):
+    for path in paths:
+        if path not in _levels:
+            _levels[path] = load_map(path, graphics=False)
+
+
+def _init_worker(paths):
+    pygame.display.init()
+    _load_levels(paths)
+
+
+def run_job(job):
+    """Ejecuta un trabajo y devuelve el resultado de run_headless más el propio trabajo."""
+    path = job["map"]
+    _load_levels([path])
+    level = build_level_state(_levels[path])
+
+    if "player_spawn" in job:
+        level["player_spawn"] = tuple(job["player_spawn"])
+    speed = job.get("enemy_speed", 1.0)
+    health = job.get("enemy_health", 1.0)
+    if speed != 1.0 or health != 1.0:
+        for enemy in level["enemies"]:
+            enemy.speed *= speed
+            enemy.health *= health
+
+    source = ScriptedInput.from_file(job["script"]) if job.get("script") else NullInput()
+    result = run_headless(path, job.get("ticks", DEFAULT_TICKS), source,
+                          job.get("until_end", False), level=level)
+    result["job"] = job
+    return result
+
+
+def _summary(values):
+    if not values:
+        return None
+    return {"mean": sum(values) / len(values), "min": min(values), "max": max(values)}
+
+
+def run_batch(jobs, workers=None):
+    """
+    Ejecuta los trabajos en un pool de 'workers' procesos (por defecto uno
+    por CPU) y devuelve el informe: los resultados de cada trabajo, en el
+    orden de 'jobs', y los totales.
+    """
+    paths = sorted({job["map"] for job in jobs})
+    _load_levels(paths)
+
+    start = time.perf_counter()
+    if workers == 1:
+        _init_worker(paths)
+        results = [run_job(job) for job in jobs]
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(paths,)) as pool:
+            results = pool.map(run_job, jobs, chunksize=1)
+            pool.close()
+            pool.join()
+    elapsed = time.perf_counter() - start
+
+    ticks = sum(r["ticks"] for r in results)
+    completions = [r["completion_time"] for r in results if r["completed"]]
+    return {
+        "runs": len(results),
+        "seconds": elapsed,
+        "ticks": ticks,
+        "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+        "run_ticks_per_second": _summary([r["ticks_per_second"] for r in results]),
+        "deaths": sum(r["deaths"] for r in results),
+        "deaths_per_run": _summary([r["deaths"] for r in results]),
+        "completed": len(completions),
+        "completion_time": _summary(completions),
+        "results": results,
+    }
+
+
+def _print_report(report):
+    print("%-32s %-16s %8s %10s %7s %10s" % ("mapa", "guion", "ticks", "ticks/s", "muertes", "final (s)"))
+    for r in report["results"]:
+        job = r["job"]
+        script = os.path.basename(job.get("script") or "-")
+        completion = "%.2f" % r["completion_time"] if r["completed"] else "-"
+        print("%-32s %-16s %8d %10.0f %7d %10s"
+              % (os.path.basename(job["map"]), script, r["ticks"], r["ticks_per_second"], r["deaths"], completion))
+    print()
+    print("Simulaciones:    %d en %.2f s" % (report["runs"], report["seconds"]))
+    print("Ticks/s totales: %.0f (%d ticks)" % (report["ticks_per_second"], report["ticks"]))
+    per_run = report["run_ticks_per_second"]
+    print("Ticks/s por simulación: media %.0f, mín %.0f, máx %.0f" % (per_run["mean"], per_run["min"], per_run["max"]))
+    deaths = report["deaths_per_run"]
+    print("Muertes:         %d (media %.2f, máx %d)" % (report["deaths"], deaths["mean"], deaths["max"]))
+    completion = report["completion_time"]
+    if completion:
+        print("Completadas:     %d de %d; tiempo medio %.2f s (mín %.2f, máx %.2f)"
+              % (report["completed"], report["runs"], completion["mean"], completion["min"], completion["max"]))
+    else:
+        print("Completadas:     0 de %d" % report["runs"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta simulaciones sin ventana en paralelo.")
+    parser.add_argument("--jobs", help="archivo JSON con la lista de trabajos")
+    parser.add_argument("--maps", nargs="+", default=[DEFAULT_MAP], help="mapas a simular (sin --jobs)")
+    parser.add_argument("--scripts", nargs="+", default=[None], help="guiones de entrada (sin --jobs)")
+    parser.add_argument("--repeat", type=int, default=1, help="veces que se repite cada combinación")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="ticks por simulación")
+    parser.add_argument("--until-end", action="store_true", help="parar al llegar al final del nivel")
+    parser.add_argument("--workers", type=int, help="procesos (por defecto, uno por CPU)")
+    parser.add_argument("--json", help="guarda también el informe completo en este archivo")
+    args = parser.parse_args()
+
+    if args.jobs:
+        with open(args.jobs, encoding="utf-8") as f:
+            jobs = json.load(f)
+    else:
+        jobs = [{"map": path, "script": script, "ticks": args.ticks, "until_end": args.until_end}
+                for path in args.maps for script in args.scripts for _ in range(args.repeat)]
+
+    report = run_batch(jobs, args.workers)
+    _print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
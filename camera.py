@@ -8,8 +8,11 @@ class Camera:
         self.map_height = map_height
         self.screen_width = screen_width
         self.screen_height = screen_height
+        # Posición en el tick anterior, para interpolar al dibujar (None hasta el primer update)
+        self.previous = None
 
     def update(self, target_rect):
+        previous = (self.x, self.y)
         # Centra la cámara en el centro del jugador
         self.x = target_rect.centerx - self.screen_width // 2
         self.y = target_rect.centery - self.screen_height // 2
@@ -27,6 +30,24 @@ class Camera:
         if self.y > max_y:
             self.y = max_y
 
+        self.previous = previous if self.previous is not None else (self.x, self.y)
+
+    def interpolated(self, alpha):
+        """Copia de la cámara situada entre el tick anterior (alpha=0) y el actual (alpha=1)."""
+        view = Camera(self.map_width, self.map_height, self.screen_width, self.screen_height)
+        if self.previous is None or alpha >= 1.0:
+            view.x, view.y = self.x, self.y
+        else:
+            x0, y0 = self.previous
+            view.x = round(x0 + (self.x - x0) * alpha)
+            view.y = round(y0 + (self.y - y0) * alpha)
+        return view
+
+    def view_rect(self, margin=0):
+        """Zona del mapa que se ve en pantalla, ampliada 'margin' píxeles por cada lado."""
+        return pygame.Rect(self.x - margin, self.y - margin,
+                           self.screen_width + 2 * margin, self.screen_height + 2 * margin)
+
     def apply(self, rect):
         # Devuelve un rect desplazado por la cámara
         return rect.move(-self.x, -self.y)
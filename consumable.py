@@ -1,12 +1,32 @@
 import pygame
 
-class Consumable(pygame.sprite.Sprite):
+from entity_pool import SlottedSprite
+
+# Imagen compartida por todos los consumibles (se crea al primer uso)
+_image = None
+
+
+def consumable_image():
+    global _image
+    if _image is None:
+        # Por ahora, una imagen simple (más adelante puedes cargar una imagen real)
+        _image = pygame.Surface((32, 32))
+        _image.fill((0, 255, 0))  # Verde, para distinguirlo
+    return _image
+
+
+class Consumable(SlottedSprite):
+    __slots__ = ("consumable_type", "health_value", "pickup_sound", "image", "rect")
+
     def __init__(self, x, y, consumable_type="fish", health_value=50, pickup_sound=None):
         super().__init__()
+        self.rect = pygame.Rect(0, 0, 32, 32)
+        self.reset(x, y, consumable_type, health_value, pickup_sound)
+
+    def reset(self, x, y, consumable_type="fish", health_value=50, pickup_sound=None):
+        """Deja el consumible como recién creado en (x, y) (ver entity_pool.EntityPool)."""
         self.consumable_type = consumable_type
         self.health_value = health_value
         self.pickup_sound = pickup_sound
-        # Por ahora, asigna una imagen simple (más adelante puedes cargar una imagen real)
-        self.image = pygame.Surface((32, 32))
-        self.image.fill((0, 255, 0))  # Verde, para distinguirlo
-        self.rect = self.image.get_rect(topleft=(x, y))
+        self.image = consumable_image()
+        self.rect.topleft = (x, y)
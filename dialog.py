@@ -1,6 +1,10 @@
 # dialog.py
 import pygame
 
+import asset_cache
+import audio
+import render_backend
+
 def wrap_text(text, font, max_width):
     """Divide el texto en líneas que se ajusten al ancho máximo."""
     words = text.split(' ')
@@ -22,8 +26,8 @@ def show_dialog_with_name(screen, speaker_name, dialog_text):
     Ejemplo de función de diálogo con nombre, al estilo "caja de texto + recuadro de nombre".
     Espera a que el jugador presione una tecla para continuar.
     """
-    font = pygame.font.Font(None, 28)
-    name_font = pygame.font.Font(None, 24)
+    font = asset_cache.load_font(None, 28)
+    name_font = asset_cache.load_font(None, 24)
 
     margin = 20
     max_text_width = screen.get_width() - 80
@@ -87,8 +91,9 @@ def show_dialog_with_name(screen, speaker_name, dialog_text):
         screen.blit(text_box, text_box_rect)
         screen.blit(name_box, name_box_rect)
 
-        pygame.display.flip()
+        render_backend.flip()
+        audio.update()
 
     # Limpiar el diálogo al terminar
     screen.blit(background_snapshot, (0, 0))
-    pygame.display.flip()
+    render_backend.flip()
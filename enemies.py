@@ -1,84 +1,140 @@
 import pygame
 
-class Enemy(pygame.sprite.Sprite):
+from entity_pool import SlottedSprite
+
+# Distancia máxima (en píxeles) a la que un enemigo puede ver al jugador
+VISION_RANGE = 400
+
+ENEMY_COLORS = {
+    "wolf": (120, 120, 120),
+    "slime": (0, 200, 50),
+    "boss": (200, 0, 0)
+}
+# Una imagen por tipo, compartida por todos los enemigos de ese tipo
+_images = {}
+
+
+def enemy_image(enemy_type):
+    image = _images.get(enemy_type)
+    if image is None:
+        image = pygame.Surface((32, 64))
+        image.fill(ENEMY_COLORS.get(enemy_type, (255, 0, 0)))
+        _images[enemy_type] = image
+    return image
+
+
+class Enemy(SlottedSprite):
+    __slots__ = ("type", "speed", "health", "direction", "velocity", "grounded",
+                 "image", "rect", "hitbox", "previous_topleft", "damage", "sees_player")
+
+    # Parámetros de física
+    gravity = 0.8
+    jump_force = -16
+
     def __init__(self, x, y, enemy_type="wolf", speed=2, health=100):
         super().__init__()
+        self.velocity = pygame.math.Vector2(0, 0)
+        self.rect = pygame.Rect(0, 0, 32, 64)
+        self.hitbox = pygame.Rect(0, 0, 22, 54)
+        self.reset(x, y, enemy_type, speed, health)
+
+    def reset(self, x, y, enemy_type="wolf", speed=2, health=100):
+        """Deja el enemigo como recién creado en (x, y) (ver entity_pool.EntityPool)."""
         self.type = enemy_type
         self.speed = speed
         self.health = health
         self.direction = 1  # 1 = derecha, -1 = izquierda
-
-        # Parámetros de física
-        self.velocity = pygame.math.Vector2(0, 0)
-        self.gravity = 0.8
-        self.jump_force = -16
+        self.velocity.update(0, 0)
         self.grounded = False
 
         # Imagen y hitbox
-        self.image = pygame.Surface((32, 64))
-        self.image.fill(self._get_color())
-        self.rect = self.image.get_rect(topleft=(x, y))
-        self.hitbox = pygame.Rect(x + 5, y + 5, 22, 54)
+        self.image = enemy_image(enemy_type)
+        self.rect.topleft = (x, y)
+        # Como pygame.Rect(x + 5, ...): las coordenadas decimales se truncan
+        self.hitbox.topleft = (int(x + 5), int(y + 5))
+        # Posición del tick anterior, para interpolar al dibujar
+        self.previous_topleft = self.rect.topleft
 
         # Daño que inflige al jugador (valor por defecto)
         self.damage = 10
+        # Si vio al jugador la última vez que lo comprobó (ver activity.EnemyActivity)
+        self.sees_player = False
 
-    def _get_color(self):
-        return {
-            "wolf": (120, 120, 120),
-            "slime": (0, 200, 50),
-            "boss": (200, 0, 0)
-        }.get(self.type, (255, 0, 0))
-
-    def apply_gravity(self):
+    def apply_gravity(self, collision_index):
+        """Aplica la gravedad y baja el hitbox hasta el primer contacto (barrido continuo)."""
         self.velocity.y += self.gravity
-        self.hitbox.y += self.velocity.y
+        return collision_index.move(self.hitbox, 0, self.velocity.y)
 
-    def move(self, collision_rects):
+    def move(self, collision_index):
+        """Mueve al enemigo; 'collision_index' es el SpatialHash de colisiones del nivel."""
         self.velocity.x = self.speed * self.direction
-        self.hitbox.x += self.velocity.x
-        # Colisiones horizontales
-        for rect in collision_rects:
-            if self.hitbox.colliderect(rect):
-                if self.velocity.x > 0:
-                    self.hitbox.right = rect.left
-                    self.direction = -1
-                elif self.velocity.x < 0:
-                    self.hitbox.left = rect.right
-                    self.direction = 1
+        # Barrido horizontal: se para en la primera pared aunque sea más fina que el paso
+        contact = collision_index.move(self.hitbox, self.velocity.x, 0)
+        if contact is not None and contact[1] is not None:
+            self.direction = -1 if self.velocity.x > 0 else 1
+        # Solapamientos que ya existían antes de moverse (sólo contra los rects que tocan el hitbox)
+        if contact is not None and contact[2]:
+            for rect in collision_index.iter_colliding(self.hitbox):
+                if self.hitbox.colliderect(rect):
+                    if self.velocity.x > 0:
+                        self.hitbox.right = rect.left
+                        self.direction = -1
+                    elif self.velocity.x < 0:
+                        self.hitbox.left = rect.right
+                        self.direction = 1
 
         # Movimiento vertical
-        self.apply_gravity()
+        contact = self.apply_gravity(collision_index)
         self.grounded = False
-        for rect in collision_rects:
-            if self.hitbox.colliderect(rect):
-                if self.velocity.y > 0:
-                    self.hitbox.bottom = rect.top
-                    self.velocity.y = 0
-                    self.grounded = True
-                elif self.velocity.y < 0:
-                    self.hitbox.top = rect.bottom
-                    self.velocity.y = 0
+        if contact is not None and contact[1] is not None:
+            self.velocity.y = 0
+            # Normal hacia arriba: ha caído sobre un suelo
+            self.grounded = contact[0][1] < 0
+        if contact is not None and contact[2]:
+            for rect in collision_index.iter_colliding(self.hitbox):
+                if self.hitbox.colliderect(rect):
+                    if self.velocity.y > 0:
+                        self.hitbox.bottom = rect.top
+                        self.velocity.y = 0
+                        self.grounded = True
+                    elif self.velocity.y < 0:
+                        self.hitbox.top = rect.bottom
+                        self.velocity.y = 0
 
         self.rect.topleft = self.hitbox.topleft
 
-    def update(self, collision_rects):
-        self.move(collision_rects)
+    def update(self, collision_index):
+        self.previous_topleft = self.rect.topleft
+        self.move(collision_index)
         if self.grounded:
-            self._check_ledge(collision_rects)
+            self._check_ledge(collision_index)
 
-    def _check_ledge(self, collision_rects):
+    def _check_ledge(self, collision_index):
         """Verifica si el enemigo está a punto de caerse y cambia de dirección."""
         sensor_y = self.hitbox.bottom + 5  # Justo debajo de los pies
         sensor_left = pygame.Rect(self.hitbox.left, sensor_y, 1, 5)
         sensor_right = pygame.Rect(self.hitbox.right - 1, sensor_y, 1, 5)
-        collision_left = any(sensor_left.colliderect(r) for r in collision_rects)
-        collision_right = any(sensor_right.colliderect(r) for r in collision_rects)
+        collision_left = collision_index.collides(sensor_left)
+        collision_right = collision_index.collides(sensor_right)
         if self.direction == 1 and not collision_right:
             self.direction = -1
         elif self.direction == -1 and not collision_left:
             self.direction = 1
 
+    def can_see(self, target_rect, solid_grid, max_distance=VISION_RANGE):
+        """
+        True si 'target_rect' está a menos de 'max_distance' y no hay geometría
+        sólida entre los ojos del enemigo y el centro del objetivo.
+        'solid_grid' es el SolidGrid del nivel (tilemap.get_solid_grid).
+        """
+        eye = (self.hitbox.centerx, self.hitbox.top + 10)
+        target = target_rect.center
+        dx = target[0] - eye[0]
+        dy = target[1] - eye[1]
+        if dx * dx + dy * dy > max_distance * max_distance:
+            return False
+        return solid_grid.line_of_sight(eye, target)
+
     def take_damage(self, damage):
         """Resta salud al enemigo y lo elimina si la salud llega a cero."""
         self.health -= damage
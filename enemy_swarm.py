@@ -0,0 +1,346 @@
+# enemy_swarm.py
+"""
+Backend vectorizado de enemigos para enjambres (requiere NumPy, que es
+opcional: el juego normal sólo usa enemies.Enemy).
+
+EnemySwarm guarda posiciones, velocidades, direcciones, salud y el estado
+"en el suelo" de todos los enemigos en arrays y aplica en bloque lo mismo
+que Enemy.update: patrulla horizontal con giro al chocar, gravedad con
+aterrizaje, giro en los bordes de las plataformas y colisión contra los
+rectángulos del nivel. Un tick del enjambre da el mismo resultado que
+llamar a Enemy.update en cada enemigo, salvo para enemigos que empiezan
+dentro de la geometría (Enemy los saca con su resolución por solapamiento;
+aquí se asume que no ocurre).
+
+Benchmark:
+    python enemy_swarm.py [mapa.tmx]
+"""
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+import pygame
+
+# Medidas del hitbox de Enemy y su desplazamiento respecto a la posición de spawn
+HITBOX_OFFSET = 5
+HITBOX_WIDTH = 22
+HITBOX_HEIGHT = 54
+GRAVITY = 0.8
+DEFAULT_DAMAGE = 10
+# Tamaño máximo (enemigos x rectángulos) de las matrices temporales de cada bloque
+BLOCK_CELLS = 1 << 20
+# Enemigos por grupo de la fase amplia: los enemigos se ordenan por x y cada
+# grupo de GROUP_SIZE sólo se compara con los rects del tramo que ocupa
+GROUP_SIZE = 256
+# Intentos por enemigo para encontrarle un hueco libre en el benchmark
+SPAWN_ATTEMPTS = 100
+
+
+def _round_coord(values):
+    """Redondeo de pygame al asignar coordenadas decimales a un Rect (mitades hacia fuera del 0)."""
+    return np.where(values >= 0, np.floor(values + 0.5), -np.floor(0.5 - values)).astype(np.int64)
+
+
+class EnemySwarm:
+    """
+    Conjunto de enemigos en arrays de NumPy. 'collision_rects' son los
+    rectángulos de colisión del nivel (tilemap.get_collision_rects).
+    """
+    def __init__(self, collision_rects, capacity=64):
+        if np is None:
+            raise ImportError("EnemySwarm necesita NumPy (pip install numpy)")
+        rects = [pygame.Rect(r) for r in collision_rects]
+        self.rect_left = np.array([r.left for r in rects], dtype=np.int64)
+        self.rect_top = np.array([r.top for r in rects], dtype=np.int64)
+        self.rect_right = np.array([r.right for r in rects], dtype=np.int64)
+        self.rect_bottom = np.array([r.bottom for r in rects], dtype=np.int64)
+
+        self.count = 0
+        self.types = []
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity):
+        """Crea (o agranda) los arrays conservando los enemigos existentes."""
+        n = self.count
+        fields = {
+            "x": np.int64, "y": np.int64,
+            "velocity_x": np.float64, "velocity_y": np.float64,
+            "speed": np.float64, "direction": np.int64,
+            "health": np.float64, "damage": np.float64,
+            "grounded": np.bool_, "alive": np.bool_,
+        }
+        for name, dtype in fields.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if n:
+                array[:n] = getattr(self, name)[:n]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    @classmethod
+    def from_spawns(cls, collision_rects, spawns):
+        """Crea el enjambre a partir de los spawns del nivel (tilemap.get_enemy_spawns)."""
+        swarm = cls(collision_rects, capacity=len(spawns))
+        for spawn in spawns:
+            swarm.spawn(spawn["x"], spawn["y"], spawn.get("type", "wolf"),
+                        spawn.get("speed", 2), spawn.get("health", 100))
+        return swarm
+
+    def spawn(self, x, y, enemy_type="wolf", speed=2, health=100):
+        """Añade un enemigo igual que Enemy(x, y, ...) y devuelve su índice."""
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        i = self.count
+        # Como en Enemy: hitbox en (x + 5, y + 5) con las coordenadas decimales truncadas
+        self.x[i] = int(x + HITBOX_OFFSET)
+        self.y[i] = int(y + HITBOX_OFFSET)
+        self.velocity_x[i] = 0
+        self.velocity_y[i] = 0
+        self.speed[i] = speed
+        self.direction[i] = 1
+        self.health[i] = health
+        self.damage[i] = DEFAULT_DAMAGE
+        self.grounded[i] = False
+        self.alive[i] = True
+        self.types.append(enemy_type)
+        self.count += 1
+        return i
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive[:self.count]))
+
+    # --- Colisiones contra la geometría estática ---
+
+    def _groups(self, indices):
+        """Divide 'indices' en grupos de GROUP_SIZE enemigos contiguos en x."""
+        order = indices[np.argsort(self.x[indices], kind="stable")]
+        for start in range(0, len(order), GROUP_SIZE):
+            yield order[start:start + GROUP_SIZE]
+
+    def _nearby_rects(self, indices):
+        """
+        Los rects con los que pueden chocar en este tick los enemigos de
+        'indices': los que se solapan en horizontal con el tramo que ocupan,
+        ampliado con el mayor paso horizontal posible.
+        """
+        x = self.x[indices]
+        margin = int(np.ceil(np.abs(self.speed[indices]).max())) + 1
+        low = x.min() - margin
+        high = x.max() + HITBOX_WIDTH + margin
+        near = np.flatnonzero((self.rect_left < high) & (self.rect_right > low))
+        return self.rect_left[near], self.rect_top[near], self.rect_right[near], self.rect_bottom[near]
+
+    @staticmethod
+    def _blocks(indices, rect_count):
+        """Divide 'indices' en bloques para que las matrices temporales no crezcan sin límite."""
+        size = max(1, BLOCK_CELLS // max(1, rect_count))
+        for start in range(0, len(indices), size):
+            yield indices[start:start + size]
+
+    def _first_contact_x(self, indices, step, rects):
+        """
+        Barrido horizontal: para cada enemigo, el borde del primer rect con el
+        que choca al moverse 'step' píxeles (o -1 / máximo si no choca).
+        """
+        x = self.x[indices, None]
+        y = self.y[indices, None]
+        step = step[:, None]
+        left, top, right, bottom = rects
+        overlap_y = (top < y + HITBOX_HEIGHT) & (y < bottom)
+        # Los rects que ya se solapan con el hitbox no cuentan y el contacto
+        # justo al final del paso tampoco (igual que SpatialHash.sweep)
+        outside = ~(overlap_y & (left < x + HITBOX_WIDTH) & (x < right))
+        ahead_right = overlap_y & outside & (step > 0) & (left >= x + HITBOX_WIDTH) & (left < x + HITBOX_WIDTH + step)
+        ahead_left = overlap_y & outside & (step < 0) & (right <= x) & (right > x + step)
+        big = np.iinfo(np.int64).max
+        hit_left = np.where(ahead_right, left, big).min(axis=1, initial=big)
+        hit_right = np.where(ahead_left, right, -big).max(axis=1, initial=-big)
+        return hit_left, hit_right, big
+
+    def _first_contact_y(self, indices, step, rects):
+        x = self.x[indices, None]
+        y = self.y[indices, None]
+        step = step[:, None]
+        left, top, right, bottom = rects
+        overlap_x = (left < x + HITBOX_WIDTH) & (x < right)
+        outside = ~(overlap_x & (top < y + HITBOX_HEIGHT) & (y < bottom))
+        below = overlap_x & outside & (step > 0) & (top >= y + HITBOX_HEIGHT) & (top < y + HITBOX_HEIGHT + step)
+        above = overlap_x & outside & (step < 0) & (bottom <= y) & (bottom > y + step)
+        big = np.iinfo(np.int64).max
+        hit_top = np.where(below, top, big).min(axis=1, initial=big)
+        hit_bottom = np.where(above, bottom, -big).max(axis=1, initial=-big)
+        return hit_top, hit_bottom, big
+
+    def _sensor_hits(self, indices, sensor_x, rects):
+        """True por enemigo si el sensor de 1x5 bajo sus pies en 'sensor_x' toca algún rect."""
+        left, top, right, bottom = rects
+        sensor_y = (self.y[indices] + HITBOX_HEIGHT + 5)[:, None]
+        sensor_x = sensor_x[:, None]
+        return ((left < sensor_x + 1) & (sensor_x < right)
+                & (top < sensor_y + 5) & (sensor_y < bottom)).any(axis=1)
+
+    # --- Simulación ---
+
+    def update(self):
+        """Un tick para todos los enemigos vivos (equivale a Enemy.update en cada uno)."""
+        alive = np.flatnonzero(self.alive[:self.count])
+        if not len(self.rect_left):
+            self._update_without_geometry(alive)
+            return
+        if not len(alive):
+            return
+        # Fase amplia: cada grupo de enemigos sólo se compara con los rects cercanos
+        for group in self._groups(alive):
+            rects = self._nearby_rects(group)
+            for indices in self._blocks(group, len(rects[0])):
+                self._update_block(indices, rects)
+
+    def _update_block(self, i, rects):
+        # Movimiento horizontal con barrido: se para en la primera pared y se da la vuelta
+        self.velocity_x[i] = self.speed[i] * self.direction[i]
+        x = self.x[i]
+        step = _round_coord(x + self.velocity_x[i]) - x
+        hit_left, hit_right, big = self._first_contact_x(i, step, rects)
+        new_x = x + step
+        blocked_right = hit_left != big
+        blocked_left = hit_right != -big
+        new_x = np.where(blocked_right, hit_left - HITBOX_WIDTH, new_x)
+        new_x = np.where(blocked_left, hit_right, new_x)
+        self.x[i] = new_x
+        turned = blocked_right | blocked_left
+        self.direction[i] = np.where(turned, np.where(self.velocity_x[i] > 0, -1, 1), self.direction[i])
+
+        # Gravedad y movimiento vertical con barrido
+        self.velocity_y[i] += GRAVITY
+        y = self.y[i]
+        step = _round_coord(y + self.velocity_y[i]) - y
+        hit_top, hit_bottom, big = self._first_contact_y(i, step, rects)
+        landed = hit_top != big
+        bumped = hit_bottom != -big
+        new_y = y + step
+        new_y = np.where(landed, hit_top - HITBOX_HEIGHT, new_y)
+        new_y = np.where(bumped, hit_bottom, new_y)
+        self.y[i] = new_y
+        self.velocity_y[i] = np.where(landed | bumped, 0.0, self.velocity_y[i])
+        self.grounded[i] = landed
+
+        # Giro en los bordes: sólo los que están en el suelo
+        g = i[landed]
+        if len(g):
+            x = self.x[g]
+            ground_left = self._sensor_hits(g, x, rects)
+            ground_right = self._sensor_hits(g, x + HITBOX_WIDTH - 1, rects)
+            direction = self.direction[g]
+            direction = np.where((direction == 1) & ~ground_right, -1,
+                                 np.where((direction == -1) & ~ground_left, 1, direction))
+            self.direction[g] = direction
+
+    def _update_without_geometry(self, i):
+        """Nivel sin colisiones: sólo patrulla y caída libre."""
+        self.velocity_x[i] = self.speed[i] * self.direction[i]
+        self.x[i] = _round_coord(self.x[i] + self.velocity_x[i])
+        self.velocity_y[i] += GRAVITY
+        self.y[i] = _round_coord(self.y[i] + self.velocity_y[i])
+        self.grounded[i] = False
+
+    # --- Consultas ---
+
+    def hitbox(self, index):
+        return pygame.Rect(int(self.x[index]), int(self.y[index]), HITBOX_WIDTH, HITBOX_HEIGHT)
+
+    def rect(self, index):
+        """Rect de dibujado (32x64 en la esquina del hitbox, como Enemy.rect)."""
+        return pygame.Rect(int(self.x[index]), int(self.y[index]), 32, 64)
+
+    def query(self, area):
+        """Índices de los enemigos vivos cuyo rect (32x64) se solapa con 'area'."""
+        area = pygame.Rect(area)
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        mask = (self.alive[:n] & (x < area.right) & (area.left < x + 32)
+                & (y < area.bottom) & (area.top < y + 64))
+        return np.flatnonzero(mask)
+
+    def take_damage(self, indices, damage):
+        """Resta salud a los enemigos indicados; los que llegan a cero mueren."""
+        self.health[indices] -= damage
+        dead = indices[self.health[indices] <= 0] if len(indices) else indices
+        self.alive[dead] = False
+
+
+def benchmark(tmx_path="assets/tilemaps/level1_1.tmx", budget_ms=16.0, ticks=20):
+    """
+    Cuántos enemigos caben en 'budget_ms' por tick con EnemySwarm y con
+    objetos Enemy. Devuelve una lista de (n, ms_enjambre, ms_objetos).
+    """
+    import random
+    import time
+
+    from tilemap import load_map, get_collision_rects, get_collision_index
+    from enemies import Enemy
+
+    level = load_map(tmx_path, graphics=False)
+    rects = get_collision_rects(level)
+    index = get_collision_index(level)
+    width = level.width * level.tilewidth
+    height = level.height * level.tileheight
+
+    def spawns(n):
+        rng = random.Random(n)
+        result = []
+        for _ in range(n * SPAWN_ATTEMPTS):
+            if len(result) == n:
+                return result
+            x = rng.randrange(0, width - 32)
+            y = rng.randrange(0, height - 64)
+            if pygame.Rect(x + HITBOX_OFFSET, y + HITBOX_OFFSET, HITBOX_WIDTH, HITBOX_HEIGHT).collidelist(rects) < 0:
+                result.append({"x": x, "y": y})
+        if len(result) < n:
+            raise ValueError("%s: sólo se encontraron %d de %d huecos libres para enemigos en %d intentos"
+                             % (tmx_path, len(result), n, n * SPAWN_ATTEMPTS))
+        return result
+
+    results = []
+    n = 256
+    objects_fit = True
+    while True:
+        points = spawns(n)
+        swarm = EnemySwarm.from_spawns(rects, points)
+        swarm.update()
+        start = time.perf_counter()
+        for _ in range(ticks):
+            swarm.update()
+        swarm_ms = (time.perf_counter() - start) * 1000 / ticks
+
+        objects_ms = None
+        if objects_fit:
+            enemies = [Enemy(p["x"], p["y"]) for p in points]
+            start = time.perf_counter()
+            for _ in range(ticks):
+                for enemy in enemies:
+                    enemy.update(index)
+            objects_ms = (time.perf_counter() - start) * 1000 / ticks
+            objects_fit = objects_ms <= budget_ms
+
+        results.append((n, swarm_ms, objects_ms))
+        if swarm_ms > budget_ms:
+            return results
+        n *= 2
+
+
+if __name__ == "__main__":
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "assets/tilemaps/level1_1.tmx"
+    budget_ms = 16.0
+    results = benchmark(path, budget_ms)
+    print("%8s  %12s  %12s" % ("enemigos", "EnemySwarm", "Enemy"))
+    for n, swarm_ms, objects_ms in results:
+        objects = "%9.2f ms" % objects_ms if objects_ms is not None else "%12s" % "-"
+        print("%8d  %9.2f ms  %s" % (n, swarm_ms, objects))
+    # Estimación lineal a partir de la última medida dentro del presupuesto
+    fits = [(n, ms) for n, ms, _ in results if ms <= budget_ms]
+    if fits:
+        n, ms = fits[-1]
+        print("En %.0f ms caben unos %d enemigos con EnemySwarm" % (budget_ms, n * budget_ms / ms))
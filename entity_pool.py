@@ -0,0 +1,94 @@
+# entity_pool.py
+"""
+Entidades compactas y pools para reutilizarlas.
+
+pygame.sprite.Sprite no declara __slots__, así que cualquier subclase lleva
+un __dict__ por instancia. SlottedSprite implementa lo mismo que Sprite
+necesita para funcionar con pygame.sprite.Group (add_internal,
+remove_internal, kill, alive...) pero con __slots__, y las subclases sólo
+guardan los atributos que declaran.
+
+EntityPool guarda las entidades de los niveles ya terminados para
+reutilizarlas al cargar el siguiente en vez de crear objetos nuevos.
+"""
+import threading
+
+
+class SlottedSprite:
+    """Sprite sin __dict__ compatible con pygame.sprite.Group."""
+    __slots__ = ("_groups",)
+
+    def __init__(self, *groups):
+        self._groups = set()
+        if groups:
+            self.add(*groups)
+
+    def add_internal(self, group):
+        self._groups.add(group)
+
+    def remove_internal(self, group):
+        self._groups.discard(group)
+
+    def add(self, *groups):
+        for group in groups:
+            if group not in self._groups:
+                group.add_internal(self)
+                self.add_internal(group)
+
+    def remove(self, *groups):
+        for group in groups:
+            if group in self._groups:
+                group.remove_internal(self)
+                self.remove_internal(group)
+
+    def kill(self):
+        for group in tuple(self._groups):
+            group.remove_internal(self)
+        self._groups.clear()
+
+    def alive(self):
+        return bool(self._groups)
+
+    def groups(self):
+        return list(self._groups)
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+class EntityPool:
+    """
+    Pool de entidades de una clase. acquire() devuelve una entidad libre
+    reiniciada con reset(...) o, si no hay ninguna, crea una nueva con los
+    mismos argumentos. Puede usarse desde el hilo de precarga de niveles.
+    """
+    def __init__(self, cls):
+        self.cls = cls
+        self._free = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args, **kwargs):
+        with self._lock:
+            entity = self._free.pop() if self._free else None
+            if entity is None:
+                self.created += 1
+            else:
+                self.reused += 1
+        if entity is None:
+            return self.cls(*args, **kwargs)
+        entity.reset(*args, **kwargs)
+        return entity
+
+    def release(self, entities):
+        """Saca las entidades de sus grupos y las deja libres para reutilizarlas."""
+        entities = list(entities)
+        for entity in entities:
+            entity.kill()
+        with self._lock:
+            self._free.extend(entities)
+
+    def __len__(self):
+        """Entidades libres."""
+        return len(self._free)
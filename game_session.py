@@ -0,0 +1,201 @@
+# game_session.py
+"""
+Lógica de una partida sin ventana ni dibujado: el nivel cargado, el jugador,
+los enemigos, los consumibles y los temporizadores de la partida, todos
+medidos con el reloj de simulación (timestep.SimulationClock).
+
+main.py la usa para jugar y headless.py para simular niveles sin pantalla.
+"""
+import pygame
+
+from tilemap import (
+    load_map,
+    get_player_spawn,
+    get_collision_index,
+    get_solid_grid,
+    get_enemy_spawns,
+    get_consumable_spawns,
+    get_level_end
+)
+from player import Player
+from camera import Camera
+from enemies import Enemy
+from consumable import Consumable
+from spatial import SpriteGrid
+from activity import EnemyActivity
+from entity_pool import EntityPool
+
+# Daño que sufre el jugador cada segundo de juego
+HEALTH_DECREASE_RATE = 1
+# Segundos que se muestra la pantalla de muerte antes de reaparecer
+DEATH_SCREEN_DELAY = 2
+
+# Enemigos y consumibles de los niveles terminados, para reutilizarlos en los siguientes
+enemy_pool = EntityPool(Enemy)
+consumable_pool = EntityPool(Consumable)
+
+
+def load_level_state(tmx_path, graphics=True):
+    """
+    Carga un nivel y crea todo lo que depende de él: cámara, índice de colisiones,
+    enemigos y consumibles (con sus rejillas de búsqueda y el gestor de actividad
+    de los enemigos) y fin de nivel. Puede ejecutarse en un hilo aparte (ver
+    LevelPreloader), así que no dibuja nada en pantalla. Con graphics=False no
+    se cargan las imágenes del mapa.
+    """
+    return build_level_state(load_map(tmx_path, graphics=graphics))
+
+
+def build_level_state(tmx_data):
+    """
+    Como load_level_state, pero a partir de un nivel ya cargado con load_map.
+    No modifica 'tmx_data', así que un mismo nivel sirve para crear varias
+    partidas (ver batch.py).
+    """
+    map_width = tmx_data.width * tmx_data.tilewidth
+    map_height = tmx_data.height * tmx_data.tileheight
+
+    enemies = pygame.sprite.Group()
+    for enemy_data in get_enemy_spawns(tmx_data):
+        enemies.add(
+            enemy_pool.acquire(
+                x=enemy_data["x"],
+                y=enemy_data["y"],
+                enemy_type=enemy_data["type"],
+                speed=enemy_data["speed"],
+                health=enemy_data["health"]
+            )
+        )
+
+    consumables = pygame.sprite.Group()
+    for cons_data in get_consumable_spawns(tmx_data):
+        consumables.add(
+            consumable_pool.acquire(
+                x=cons_data["x"],
+                y=cons_data["y"],
+                consumable_type=cons_data["consumable_type"],
+                health_value=int(cons_data["health_value"]),
+                pickup_sound=cons_data.get("pickup_sound", None)
+            )
+        )
+
+    enemy_index = SpriteGrid(enemies)
+    return {
+        "tmx_data": tmx_data,
+        "map_width": map_width,
+        "map_height": map_height,
+        "camera": Camera(map_width, map_height, 640, 480),
+        "collision_index": get_collision_index(tmx_data),
+        "player_spawn": get_player_spawn(tmx_data),
+        "enemies": enemies,
+        # Todas las entidades creadas para el nivel, también las que mueran, para devolverlas al pool
+        "spawned_enemies": enemies.sprites(),
+        "enemy_index": enemy_index,
+        "enemy_activity": EnemyActivity(enemy_index),
+        "consumables": consumables,
+        "spawned_consumables": consumables.sprites(),
+        "consumable_index": SpriteGrid(consumables),
+        "level_end_rect": get_level_end(tmx_data),
+    }
+
+
+def release_level_state(level):
+    """Devuelve a los pools los enemigos y consumibles de un nivel que ya no se usa."""
+    enemy_pool.release(level["spawned_enemies"])
+    consumable_pool.release(level["spawned_consumables"])
+
+
+class GameSession:
+    """
+    Una partida en curso. step() avanza un tick de simulación con el estado
+    de teclado que se le pase, venga del teclado real o de un guion.
+    """
+    def __init__(self, level, clock):
+        self.clock = clock
+        self.player = Player(*level["player_spawn"], clock=clock)
+        self.deaths = 0
+        # Ticks (clock.ticks) de la última bajada de salud y de la aparición de la pantalla de muerte
+        self.last_health_tick = clock.ticks
+        self.death_screen_start_tick = None
+        self.level = None
+        self.load_level(level)
+
+    def load_level(self, level):
+        """
+        Cambia al nivel dado (un diccionario de load_level_state) y coloca al
+        jugador en su inicio. Las entidades del nivel anterior vuelven a los pools.
+        """
+        if self.level is not None and self.level is not level:
+            release_level_state(self.level)
+        self.level = level
+        self.tmx_data = level["tmx_data"]
+        self.camera = level["camera"]
+        self.map_width = level["map_width"]
+        self.map_height = level["map_height"]
+        self.collision_index = level["collision_index"]
+        self.enemies = level["enemies"]
+        self.enemy_index = level["enemy_index"]
+        self.enemy_activity = level["enemy_activity"]
+        self.solid_grid = get_solid_grid(self.tmx_data)
+        self.consumables = level["consumables"]
+        self.consumable_index = level["consumable_index"]
+        self.level_end_rect = level["level_end_rect"]
+        self.player.rect.topleft = level["player_spawn"]
+        self.player.previous_topleft = self.player.rect.topleft
+
+    def close(self):
+        """Termina la partida: devuelve las entidades a los pools y libera los recursos del jugador."""
+        release_level_state(self.level)
+        self.level = None
+        self.player.release_assets()
+
+    @property
+    def showing_death_screen(self):
+        """True mientras se muestra la pantalla de muerte (animación ya terminada)."""
+        return self.player.dead and self.player.death_animation_finished
+
+    def step(self, keys):
+        """Avanza un tick. Devuelve True si el jugador ha llegado al final del nivel."""
+        player = self.player
+        clock = self.clock
+        was_dead = player.dead
+
+        # Acciones de jugador (ATAQUE, etc.)
+        if keys[pygame.K_e]:
+            player.attack()
+
+        # Lógica de jugador y enemigos
+        player.update(self.collision_index, self.enemy_index, self.map_width, self.map_height, keys)
+        self.camera.update(player.rect)
+        # Sólo se mueven los enemigos cerca de la cámara; la rejilla de
+        # enemigos queda al día para el próximo tick
+        self.enemy_activity.update(self.camera, self.collision_index, player.rect, self.solid_grid)
+
+        # Disminuir salud cada segundo
+        if clock.ticks - self.last_health_tick >= clock.rate:
+            player.take_damage(HEALTH_DECREASE_RATE)
+            self.last_health_tick = clock.ticks
+
+        # Consumibles
+        for cons in self.consumable_index.query(player.rect):
+            cons.kill()
+            player.health = min(player.max_health, player.health + int(cons.health_value))
+
+        if player.dead and not was_dead:
+            self.deaths += 1
+
+        # Pantalla de muerte: se muestra DEATH_SCREEN_DELAY segundos y se hace respawn
+        if not player.dead:
+            self.death_screen_start_tick = None
+        elif player.death_animation_finished:
+            if self.death_screen_start_tick is None:
+                self.death_screen_start_tick = clock.ticks
+            elif clock.ticks - self.death_screen_start_tick >= clock.ticks_for(DEATH_SCREEN_DELAY):
+                player.respawn()
+                # Reiniciamos la variable para la próxima muerte
+                self.death_screen_start_tick = None
+
+        clock.step()
+
+        # Fin de nivel
+        return bool(self.level_end_rect and player.rect.colliderect(self.level_end_rect))
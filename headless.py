@@ -0,0 +1,112 @@
+# headless.py
+"""
+Simulación de un nivel sin ventana.
+
+Carga el TMX, crea la partida (game_session.GameSession) y la hace avanzar
+tick a tick lo más rápido posible, sin límite de fps ni dibujado, con la
+entrada de un guion (input_source.ScriptedInput) o sin entrada. Sirve para
+pruebas automáticas y para medir el coste de la simulación aparte del
+dibujado.
+
+Uso:
+    python headless.py [mapa.tmx] [--ticks N] [--script guion.txt] [--until-end]
+"""
+import os
+
+# El driver "dummy" de SDL no abre ventana ni necesita servidor gráfico
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import time
+
+import pygame
+
+from game_session import GameSession, load_level_state
+from input_source import NullInput, ScriptedInput
+from tilemap import get_collision_stats
+from timestep import SimulationClock
+
+DEFAULT_MAP = "assets/tilemaps/level1_1.tmx"
+# Un minuto de juego a 60 ticks por segundo
+DEFAULT_TICKS = 3600
+
+
+def run_headless(tmx_path=DEFAULT_MAP, ticks=DEFAULT_TICKS, input_source=None, stop_at_level_end=False,
+                 level=None):
+    """
+    Simula 'ticks' ticks del nivel y devuelve un diccionario con el resultado:
+    ticks simulados, tiempo real, ticks por segundo, muertes, si se llegó al
+    final del nivel y en qué segundo de juego, el estado final y cuántos
+    rects de colisión tenía el TMX y cuántos quedaron al unirlos. 'level' es
+    un estado de nivel ya creado (game_session.build_level_state); si no se
+    da, se carga 'tmx_path'. Al terminar se cierra la partida (GameSession.close).
+    """
+    pygame.display.init()
+    if input_source is None:
+        input_source = NullInput()
+
+    clock = SimulationClock()
+    load_start = time.perf_counter()
+    if level is None:
+        level = load_level_state(tmx_path, graphics=False)
+    session = GameSession(level, clock)
+    load_seconds = time.perf_counter() - load_start
+
+    completion_time = None
+    start = time.perf_counter()
+    for tick in range(ticks):
+        if session.step(input_source.keys(tick)) and completion_time is None:
+            completion_time = clock.time
+            if stop_at_level_end:
+                break
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "map": tmx_path,
+        "ticks": clock.ticks,
+        "sim_seconds": clock.time,
+        "load_seconds": load_seconds,
+        "seconds": elapsed,
+        "ticks_per_second": clock.ticks / elapsed if elapsed > 0 else float("inf"),
+        "deaths": session.deaths,
+        "completed": completion_time is not None,
+        "completion_time": completion_time,
+        "player_position": session.player.rect.topleft,
+        "player_health": session.player.health,
+        "enemies_alive": len(session.enemies),
+        "consumables_left": len(session.consumables),
+        "collision_rects": get_collision_stats(session.tmx_data),
+    }
+    session.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula un nivel sin ventana y mide los ticks por segundo.")
+    parser.add_argument("map", nargs="?", default=DEFAULT_MAP, help="ruta del TMX")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="ticks a simular")
+    parser.add_argument("--script", help="guion de entrada (ver input_source.ScriptedInput.from_file)")
+    parser.add_argument("--until-end", action="store_true", help="parar al llegar al final del nivel")
+    args = parser.parse_args()
+
+    pygame.init()
+    source = ScriptedInput.from_file(args.script) if args.script else NullInput()
+    result = run_headless(args.map, args.ticks, source, args.until_end)
+    pygame.quit()
+
+    print("Mapa:            %s" % result["map"])
+    print("Carga:           %.3f s" % result["load_seconds"])
+    print("Colisiones:      %d rects en el TMX -> %d tras unirlos" % result["collision_rects"])
+    print("Ticks:           %d (%.1f s de juego)" % (result["ticks"], result["sim_seconds"]))
+    print("Tiempo real:     %.3f s" % result["seconds"])
+    print("Ticks/s:         %.0f" % result["ticks_per_second"])
+    print("Muertes:         %d" % result["deaths"])
+    if result["completed"]:
+        print("Nivel completado en %.2f s de juego" % result["completion_time"])
+    print("Jugador:         %s, salud %d" % (result["player_position"], result["player_health"]))
+    print("Enemigos vivos:  %d, consumibles: %d" % (result["enemies_alive"], result["consumables_left"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# image_prefetch.py
+import queue
+import threading
+
+import asset_cache
+
+# Imágenes que el hilo puede tener cargadas por delante de la que se muestra
+PREFETCH_DEPTH = 2
+
+
+def _resolve_scale(path, scale):
+    # 'scale' puede depender del tamaño original (p. ej. main.logo_display_size)
+    if callable(scale):
+        return scale(asset_cache.image_size(path))
+    return scale
+
+
+def load_image(path, scale=None, alpha=False):
+    """Carga síncrona: devuelve (imagen, clave para asset_cache.release)."""
+    scale = _resolve_scale(path, scale)
+    return asset_cache.load_image(path, scale, alpha), asset_cache.image_key(path, scale, alpha)
+
+
+class ImagePrefetcher:
+    """
+    Carga en un hilo en segundo plano las imágenes de una secuencia (logos,
+    escenas de la intro...) mientras se muestra la anterior.
+
+    Las imágenes se añaden con add() en el orden en que se van a mostrar y
+    se piden con get() en ese mismo orden. El hilo va como mucho 'depth'
+    imágenes por delante. Si get() pide una imagen que no está en la
+    secuencia, o su carga falló en el hilo, se carga de forma síncrona. Cada
+    imagen devuelta por get() está retenida en asset_cache hasta que quien
+    la pide llama a asset_cache.release(clave); close() libera las que no se
+    llegaron a pedir.
+    """
+    def __init__(self, depth=PREFETCH_DEPTH):
+        self.depth = depth
+        self.thread = None
+        self.hits = 0
+        self.misses = 0
+        # (ruta, escala, alpha) en el orden en que se mostrarán
+        self._sequence = []
+        self._consumed = 0
+        self._ready = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+
+    def add(self, path, scale=None, alpha=False):
+        """Añade una imagen a la secuencia (antes de start()). 'scale' como en asset_cache.load_image o una función del tamaño original."""
+        self._sequence.append((path, scale, alpha))
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run, name="ImagePrefetcher", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        for path, scale, alpha in self._sequence:
+            if self._stop.is_set():
+                return
+            try:
+                image, key = load_image(path, scale, alpha)
+                # Las imágenes del paquete (asset_bundle) se leen del disco al tocar sus
+                # píxeles: get_bounding_rect los recorre aquí y no en el primer blit
+                image.get_bounding_rect()
+                item = (path, image, key, None)
+            except Exception as e:
+                # get() la volverá a cargar de forma síncrona
+                item = (path, None, None, e)
+            while not self._stop.is_set():
+                try:
+                    self._ready.put(item, timeout=0.05)
+                    break
+                except queue.Full:
+                    pass
+            else:
+                if item[2] is not None:
+                    asset_cache.release(item[2])
+                return
+
+    def _next_item(self):
+        """La siguiente imagen del hilo, esperando a que termine de cargarla; None si el hilo ya no está."""
+        while True:
+            try:
+                return self._ready.get(timeout=0.05)
+            except queue.Empty:
+                if not self.thread.is_alive() and self._ready.empty():
+                    return None
+
+    def get(self, path, scale=None, alpha=False):
+        """Devuelve (imagen, clave) de 'path', precargada si está en la secuencia."""
+        remaining = [item[0] for item in self._sequence[self._consumed:]]
+        if self.thread is not None and path in remaining:
+            # Las imágenes anteriores de la secuencia que no se pidieron se descartan
+            while self._consumed < len(self._sequence):
+                item = self._next_item()
+                if item is None:
+                    break
+                self._consumed += 1
+                item_path, image, key, error = item
+                if item_path == path and error is None:
+                    self.hits += 1
+                    return image, key
+                if key is not None:
+                    asset_cache.release(key)
+                if item_path == path:
+                    break
+        self.misses += 1
+        return load_image(path, scale, alpha)
+
+    def close(self):
+        """Para el hilo y libera las imágenes precargadas que nadie pidió."""
+        self._stop.set()
+        if self.thread is not None:
+            self._drain()
+            self.thread.join()
+            self._drain()
+
+    def _drain(self):
+        while True:
+            try:
+                key = self._ready.get_nowait()[2]
+            except queue.Empty:
+                return
+            if key is not None:
+                asset_cache.release(key)
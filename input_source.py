@@ -0,0 +1,82 @@
+# input_source.py
+"""
+Fuentes de entrada para la simulación. Cada fuente devuelve, para cada tick,
+un estado de teclado que se consulta igual que pygame.key.get_pressed():
+keys[pygame.K_a], keys[pygame.K_SPACE]...
+"""
+from bisect import bisect_right
+
+import pygame
+
+
+class KeyState:
+    """Estado de teclado a partir del conjunto de teclas pulsadas."""
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+_NO_KEYS = KeyState()
+
+
+class LiveInput:
+    """El teclado real."""
+    def keys(self, tick):
+        return pygame.key.get_pressed()
+
+
+class NullInput:
+    """Ninguna tecla pulsada nunca."""
+    def keys(self, tick):
+        return _NO_KEYS
+
+
+def key_code(name):
+    """Código de pygame de una tecla por su nombre ("a", "space", "left"...)."""
+    constant = getattr(pygame, "K_" + name, None)
+    if constant is None:
+        constant = getattr(pygame, "K_" + name.upper(), None)
+    if constant is None:
+        raise ValueError("Tecla desconocida: %r" % name)
+    return constant
+
+
+class ScriptedInput:
+    """
+    Entrada guionizada: lista de tramos (tick_inicio, tick_fin, teclas) en los
+    que esas teclas están pulsadas (tick_fin exclusivo). Los tramos pueden
+    solaparse. Los estados se calculan al crearla, así que keys() es una
+    búsqueda binaria.
+    """
+    def __init__(self, segments):
+        self.segments = [(int(start), int(end), tuple(keys)) for start, end, keys in segments]
+        self._ticks = sorted({0} | {t for start, end, _ in self.segments for t in (start, end)})
+        self._states = []
+        for tick in self._ticks:
+            pressed = set()
+            for start, end, keys in self.segments:
+                if start <= tick < end:
+                    pressed.update(keys)
+            self._states.append(KeyState(pressed) if pressed else _NO_KEYS)
+
+    def keys(self, tick):
+        return self._states[bisect_right(self._ticks, tick) - 1]
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Lee un guion de texto: una línea por tramo, "inicio fin tecla [tecla...]",
+        p. ej. "0 120 d" o "60 61 space". Las líneas vacías y las que empiezan
+        por '#' se ignoran.
+        """
+        segments = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                start, end, *names = line.split()
+                segments.append((start, end, [key_code(name) for name in names]))
+        return cls(segments)
@@ -1,6 +1,31 @@
 import pygame
 
-def show_intro_scenes(screen):
+import asset_cache
+import audio
+import render_backend
+from image_prefetch import ImagePrefetcher
+
+# Escenas de la intro, en orden (ver show_intro_scenes)
+INTRO_SCENES = [
+    {
+        "image": "assets//intro//scene1.jpeg",
+        "dialogue": "Hace mucho tiempo, en un mundo olvidado...",
+        "duration": 4000  # milisegundos (4 segundos)
+    },
+    {
+        "image": "assets/intro/scene2.png",
+        "dialogue": "Los héroes se levantaron para enfrentar la oscuridad.",
+        "duration": 4000
+    },
+    {
+        "image": "assets/intro/scene3.png",
+        "dialogue": "Pero el destino es incierto...",
+        "duration": None  # Espera a que el usuario presione una tecla para avanzar
+    }
+]
+
+
+def show_intro_scenes(screen, prefetcher=None):
     """
     Muestra una secuencia de escenas introductorias.
     Cada escena es un diccionario con:
@@ -8,44 +33,30 @@ def show_intro_scenes(screen):
       - "dialogue": texto que se muestra en la parte inferior.
       - "duration": tiempo en milisegundos que se muestra la escena.
          (Si duration es None, se espera a que se presione una tecla para avanzar.)
+    Con 'prefetcher' (image_prefetch.ImagePrefetcher) las escenas ya vienen
+    cargadas y escaladas en segundo plano.
     """
-    scenes = [
-        {
-            "image": "assets//intro//scene1.jpeg",
-            "dialogue": "Hace mucho tiempo, en un mundo olvidado...",
-            "duration": 4000  # milisegundos (4 segundos)
-        },
-        {
-            "image": "assets/intro/scene2.png",
-            "dialogue": "Los héroes se levantaron para enfrentar la oscuridad.",
-            "duration": 4000
-        },
-        {
-            "image": "assets/intro/scene3.png",
-            "dialogue": "Pero el destino es incierto...",
-            "duration": None  # Espera a que el usuario presione una tecla para avanzar
-        }
-    ]
+    if prefetcher is None:
+        prefetcher = ImagePrefetcher()
     
-    font = pygame.font.Font(None, 28)  # Fuente por defecto, tamaño 28
+    font = asset_cache.load_font(None, 28)  # Fuente por defecto, tamaño 28
     clock = pygame.time.Clock()
     
-    for scene in scenes:
+    for scene in INTRO_SCENES:
+        # La imagen se escala para que ocupe toda la pantalla
         try:
-            image = pygame.image.load(scene["image"]).convert()
+            image, image_key = prefetcher.get(scene["image"], screen.get_size())
         except Exception as e:
             print("Error al cargar la imagen:", scene["image"])
             continue
         
-        # Escalar la imagen para que ocupe toda la pantalla
-        image = pygame.transform.scale(image, screen.get_size())
-        
         start_time = pygame.time.get_ticks()
         waiting = True
         
         while waiting:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    asset_cache.release(image_key)
                     return False
                 # Si no se especifica duración, se espera a una tecla para avanzar
                 if scene["duration"] is None and event.type == pygame.KEYDOWN:
@@ -73,7 +84,10 @@ def show_intro_scenes(screen):
             screen.blit(dialogue_bg, dialogue_bg_rect)
             screen.blit(text_surface, text_rect)
             
-            pygame.display.flip()
+            render_backend.flip()
+            audio.update()
             clock.tick(60)
+
+        asset_cache.release(image_key)
     
     return True
@@ -0,0 +1,742 @@
+# level_cache.py
+"""
+Compilador de niveles.
+
+Hace una sola pasada sobre el TMX (con pytmx) y guarda junto al mapa un
+archivo binario compacto (<mapa>.tmx.lvlc) con todo lo que el juego necesita:
+gids de cada capa, origen de cada tile, animaciones, colisiones, spawns y fin
+de nivel.
+Las siguientes cargas leen sólo ese archivo y construyen un LevelData sin
+volver a parsear el XML del mapa ni de los .tsx.
+
+El archivo sólo contiene datos (registros de struct, arrays de enteros y
+cadenas UTF-8, todo en little-endian): leer una caché corrupta o ajena
+puede fallar, pero nunca ejecuta código.
+"""
+import hashlib
+import os
+import struct
+import sys
+import xml.etree.ElementTree as ElementTree
+from array import array
+
+import pygame
+
+import asset_bundle
+from atlas import TextureAtlas
+from spatial import coalesce_rects
+
+CACHE_EXTENSION = ".lvlc"
+CACHE_MAGIC = b"UGLV"
+CACHE_VERSION = 5
+_HEADER = struct.Struct("<4sH")
+
+# Registros de tamaño fijo de la caché
+_COUNT = struct.Struct("<I")
+_STRING = struct.Struct("<I")          # bytes UTF-8 que siguen
+_SOURCE = struct.Struct("<qq20s")      # mtime_ns, tamaño, sha1
+_MAP = struct.Struct("<IIIII")         # ancho, alto, ancho de tile, alto de tile, colisiones en el TMX
+_LAYER = struct.Struct("<II?dd")       # ancho, alto, visible, parallax x/y
+_TILE = struct.Struct("<BHHHHH")       # tipo y flags (ver _encode), imagen, rect
+_FRAME = struct.Struct("<II")          # gid, duración_ms
+_POINT = struct.Struct("<ii")
+_OPTIONAL_RECT = struct.Struct("<?iiii")
+_ENEMY_SPAWN = struct.Struct("<dd?d?d")        # x, y, (es_float, speed), (es_float, health); luego el tipo
+_CONSUMABLE_SPAWN = struct.Struct("<dd?d?")    # x, y, (es_float, health_value), hay sonido; luego tipo y sonido
+
+# Valores de las propiedades de capa: etiqueta + dato
+_VALUE_NONE, _VALUE_BOOL, _VALUE_INT, _VALUE_FLOAT, _VALUE_STR = range(5)
+
+
+class LevelLayer:
+    """Capa de tiles compilada: gids en un array plano de width * height."""
+    def __init__(self, name, width, height, gids, properties=None,
+                 visible=True, parallax_x=1.0, parallax_y=1.0):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.gids = gids
+        self.properties = properties or {}
+        self.visible = visible
+        self.parallax_x = parallax_x
+        self.parallax_y = parallax_y
+
+    def gid_at(self, x, y):
+        return self.gids[y * self.width + x]
+
+
+class LevelData:
+    """
+    Todo lo que el juego necesita de un nivel, ya compilado.
+
+    'tiles' va indexado por gid: None si el gid no se usa, o una tupla
+    (ruta_imagen, rect_origen, flags) donde flags = (flip_h, flip_v, flip_d).
+    Las superficies se construyen en load_images(), empaquetadas en atlas.
+
+    'animations' asocia cada gid animado con su lista de (gid_frame, duración_ms).
+
+    'colorkeys' asocia las imágenes con color transparente ('trans' en Tiled)
+    con ese color en hexadecimal ("ff00ff").
+
+    'collision_rects' son los rectángulos de "Collisions" ya unidos (ver
+    spatial.coalesce_rects); 'source_collision_count' es cuántos había en el TMX.
+    """
+    def __init__(self, path, width, height, tilewidth, tileheight, layers, tiles,
+                 collision_rects, player_spawn, enemy_spawns, consumable_spawns, level_end,
+                 animations=None, source_collision_count=None, colorkeys=None):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.tilewidth = tilewidth
+        self.tileheight = tileheight
+        self.layers = layers
+        self.tiles = tiles
+        self.collision_rects = [pygame.Rect(r) for r in collision_rects]
+        if source_collision_count is None:
+            source_collision_count = len(self.collision_rects)
+        self.source_collision_count = source_collision_count
+        self.player_spawn = player_spawn
+        self.enemy_spawns = enemy_spawns
+        self.consumable_spawns = consumable_spawns
+        self.level_end = pygame.Rect(level_end) if level_end else None
+        self.animations = animations or {}
+        self.colorkeys = colorkeys or {}
+        self.images = None
+        self.tile_regions = None
+        self.atlases = ()
+
+    def get_tile_image_by_gid(self, gid):
+        return self.images[gid] if self.images and gid < len(self.images) else None
+
+    def load_images(self):
+        """
+        Carga cada imagen de tileset una sola vez y empaqueta los tiles usados
+        en dos atlas (opacos y con transparencia). Rellena:
+          - self.tile_regions[gid] = (página_del_atlas, rect) para dibujar con 'area'
+          - self.images[gid] = subsurface de esa región (sin copiar píxeles)
+        """
+        sheets = {}
+        sheet_masks = {}
+        full_masks = {}
+        opaque = TextureAtlas(alpha=False)
+        translucent = TextureAtlas(alpha=True)
+        placements = [None] * len(self.tiles)
+
+        for gid, tile in enumerate(self.tiles):
+            if tile is None:
+                continue
+            source, rect, flags = tile
+            sheet = sheets.get(source)
+            if sheet is None:
+                # Del paquete de asset_bundle.py si está (sin decodificar), si no del archivo
+                sheet = asset_bundle.load(asset_bundle.bundle_key(source))
+                if sheet is None:
+                    sheet = pygame.image.load(source)
+                sheet = _apply_colorkey(sheet, self.colorkeys.get(source))
+                sheets[source] = sheet
+                # Una sola máscara por imagen para saber qué tiles son opacos
+                # (las imágenes sin canal alfa, como los .jpeg, son opacas enteras)
+                if sheet.get_flags() & pygame.SRCALPHA or sheet.get_colorkey() is not None:
+                    sheet_masks[source] = pygame.mask.from_surface(sheet, 254)
+                else:
+                    sheet_masks[source] = None
+
+            image = sheet.subsurface(rect) if rect else sheet
+            width, height = image.get_size()
+            full = full_masks.get((width, height))
+            if full is None:
+                full = full_masks[(width, height)] = pygame.Mask((width, height), fill=True)
+            mask = sheet_masks[source]
+            position = rect[:2] if rect else (0, 0)
+            is_opaque = mask is None or mask.overlap_area(full, position) == width * height
+
+            atlas = opaque if is_opaque else translucent
+            placements[gid] = (atlas, atlas.add(_apply_flags(image, flags)))
+
+        opaque.finalize()
+        translucent.finalize()
+        self.atlases = (opaque, translucent)
+
+        self.tile_regions = [None] * len(self.tiles)
+        self.images = [None] * len(self.tiles)
+        for gid, placement in enumerate(placements):
+            if placement is None:
+                continue
+            atlas, (page_index, rect) = placement
+            page = atlas.pages[page_index]
+            self.tile_regions[gid] = (page, rect)
+            self.images[gid] = page.subsurface(rect)
+        return self.images
+
+
+def _apply_colorkey(image, trans):
+    """
+    Como el cargador de pytmx, el color 'trans' del tileset es transparente.
+    Se pasa a canal alfa para que el atlas (BLEND_RGBA_MAX) y las máscaras
+    de opacidad lo respeten.
+    """
+    if not trans:
+        return image
+    # Sin el canal alfa original, como hace pytmx con convert()
+    keyed = pygame.image.frombytes(pygame.image.tobytes(image, "RGB"), image.get_size(), "RGB")
+    keyed.set_colorkey(pygame.Color("#" + trans.lstrip("#")))
+    image = pygame.Surface(keyed.get_size(), pygame.SRCALPHA)
+    image.blit(keyed, (0, 0))
+    return image
+
+
+def _apply_flags(image, flags):
+    flip_h, flip_v, flip_d = flags
+    if flip_d:
+        image = pygame.transform.flip(pygame.transform.rotate(image, 270), True, False)
+    if flip_h or flip_v:
+        image = pygame.transform.flip(image, flip_h, flip_v)
+    return image
+
+
+# ========================
+#   COMPILACIÓN
+# ========================
+
+def cache_path_for(tmx_path):
+    return tmx_path + CACHE_EXTENSION
+
+
+def _file_sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _source_files(tmx_path):
+    """El .tmx y los .tsx externos a los que hace referencia."""
+    sources = [tmx_path]
+    root = ElementTree.parse(tmx_path).getroot()
+    base = os.path.dirname(tmx_path)
+    for tileset in root.findall("tileset"):
+        source = tileset.get("source")
+        if source:
+            sources.append(os.path.normpath(os.path.join(base, source)))
+    return sources
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return (path, stat.st_mtime_ns, stat.st_size, _file_sha1(path))
+
+
+def _collect_tiles(tmx_data):
+    """Para cada gid usado guarda de qué imagen y rectángulo sale su tile."""
+    import pytmx
+
+    base = os.path.dirname(tmx_data.filename)
+    tiles = [None] * tmx_data.maxgid
+    for ts in tmx_data.tilesets:
+        if ts.source is None:
+            continue
+        source = os.path.normpath(os.path.join(base, ts.source))
+        real_gid = ts.firstgid
+        for y in range(ts.margin, ts.height + ts.margin - ts.tileheight + 1,
+                       ts.tileheight + ts.spacing):
+            for x in range(ts.margin, ts.width + ts.margin - ts.tilewidth + 1,
+                           ts.tilewidth + ts.spacing):
+                for gid, flags in tmx_data.map_gid(real_gid) or []:
+                    tiles[gid] = (source, (x, y, ts.tilewidth, ts.tileheight), _flags_tuple(flags))
+                real_gid += 1
+
+    # Tilesets de imágenes sueltas (una imagen por tile)
+    for gid, props in tmx_data.tile_properties.items():
+        if props.get("source") and gid < len(tiles) and tiles[gid] is None:
+            source = os.path.normpath(os.path.join(base, props["source"]))
+            tiles[gid] = (source, None, (False, False, False))
+    return tiles
+
+
+def _collect_colorkeys(tmx_data):
+    """Ruta de imagen -> color 'trans' de los tilesets e imágenes sueltas que lo tienen."""
+    base = os.path.dirname(tmx_data.filename)
+    colorkeys = {}
+    for ts in tmx_data.tilesets:
+        if ts.source is not None and getattr(ts, "trans", None):
+            colorkeys[os.path.normpath(os.path.join(base, ts.source))] = ts.trans
+    for props in tmx_data.tile_properties.values():
+        if props.get("source") and props.get("trans"):
+            colorkeys[os.path.normpath(os.path.join(base, props["source"]))] = props["trans"]
+    return colorkeys
+
+
+def _collect_animations(tmx_data):
+    """gid -> [(gid_frame, duración_ms), ...] de los tiles animados en los tilesets."""
+    animations = {}
+    for gid, props in tmx_data.tile_properties.items():
+        frames = props.get("frames")
+        if frames:
+            animations[gid] = [(frame.gid, frame.duration) for frame in frames]
+    return animations
+
+
+def _flags_tuple(flags):
+    if not flags:
+        return (False, False, False)
+    return (bool(flags.flipped_horizontally), bool(flags.flipped_vertically),
+            bool(flags.flipped_diagonally))
+
+
+def _number_property(value):
+    """
+    Las propiedades sin tipo de Tiled llegan como texto ("2", "1.5"): se
+    convierten a número. Si no lo son se dejan tal cual (y el nivel se usa
+    sin caché, ver load_level).
+    """
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        return int(number) if number.is_integer() else number
+    return value
+
+
+def _optional_str(value):
+    return None if value is None else str(value)
+
+
+def compile_level(tmx_path):
+    """Recorre el mapa una sola vez y devuelve el diccionario que se guarda en caché."""
+    import pytmx
+
+    # Sin cargador de imágenes: sólo hace falta la estructura del mapa
+    tmx_data = pytmx.TiledMap(tmx_path)
+
+    layers = []
+    collision_rects = []
+    player_spawn = None
+    enemy_spawns = []
+    consumable_spawns = []
+    level_end = None
+
+    for layer in tmx_data.layers:
+        if isinstance(layer, pytmx.TiledTileLayer):
+            gids = array("I", (gid for row in layer.data for gid in row))
+            layers.append({
+                "name": layer.name,
+                "width": layer.width,
+                "height": layer.height,
+                "gids": gids,
+                "properties": dict(layer.properties),
+                "visible": bool(layer.visible),
+                "parallax_x": float(getattr(layer, "parallaxx", 1.0)),
+                "parallax_y": float(getattr(layer, "parallaxy", 1.0)),
+            })
+        elif isinstance(layer, pytmx.TiledObjectGroup):
+            for obj in layer:
+                if player_spawn is None and obj.name == "PlayerSpawn":
+                    player_spawn = (int(obj.x), int(obj.y))
+
+                if layer.name == "Collisions":
+                    collision_rects.append(tuple(pygame.Rect(obj.x, obj.y, obj.width, obj.height)))
+                elif layer.name == "Enemies" and obj.type == "enemy":
+                    enemy_spawns.append({
+                        "x": obj.x,
+                        "y": obj.y,
+                        "type": str(obj.properties.get("enemy_type", "wolf")),
+                        "speed": _number_property(obj.properties.get("enemy_speed", 2)),
+                        "health": _number_property(obj.properties.get("enemy_health", 100))
+                    })
+                elif layer.name == "Consumables" and obj.type == "consumable":
+                    consumable_spawns.append({
+                        "x": obj.x,
+                        "y": obj.y,
+                        "consumable_type": str(obj.properties.get("consumable_type", "fish")),
+                        "health_value": _number_property(obj.properties.get("health_value", 50)),
+                        "pickup_sound": _optional_str(obj.properties.get("pickup_sound", None))
+                    })
+                elif layer.name == "LevelEnd" and level_end is None and obj.name == "LevelEnd":
+                    level_end = tuple(pygame.Rect(obj.x, obj.y, obj.width, obj.height))
+
+    return {
+        "sources": [_source_signature(p) for p in _source_files(tmx_path)],
+        "width": tmx_data.width,
+        "height": tmx_data.height,
+        "tilewidth": tmx_data.tilewidth,
+        "tileheight": tmx_data.tileheight,
+        "layers": layers,
+        "tiles": _collect_tiles(tmx_data),
+        "animations": _collect_animations(tmx_data),
+        "colorkeys": _collect_colorkeys(tmx_data),
+        # Se guardan ya unidos: menos rects que comprobar por entidad y sin costuras en el suelo
+        "collision_rects": [tuple(r) for r in coalesce_rects(collision_rects)],
+        "source_collision_count": len(collision_rects),
+        "player_spawn": player_spawn or (0, 0),
+        "enemy_spawns": enemy_spawns,
+        "consumable_spawns": consumable_spawns,
+        "level_end": level_end,
+    }
+
+
+class _CacheWriter:
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, record, *values):
+        self.parts.append(record.pack(*values))
+
+    def count(self, n):
+        self.pack(_COUNT, n)
+
+    def string(self, text):
+        data = text.encode("utf-8")
+        self.pack(_STRING, len(data))
+        self.parts.append(data)
+
+    def uints(self, values):
+        data = array("I", values)
+        if sys.byteorder != "little":
+            data.byteswap()
+        self.count(len(data))
+        self.parts.append(data.tobytes())
+
+    def ints(self, values):
+        data = array("i", values)
+        if sys.byteorder != "little":
+            data.byteswap()
+        self.count(len(data))
+        self.parts.append(data.tobytes())
+
+    def value(self, value):
+        if value is None:
+            self.parts.append(bytes((_VALUE_NONE,)))
+        elif isinstance(value, bool):
+            self.parts.append(bytes((_VALUE_BOOL, value)))
+        elif isinstance(value, int):
+            self.parts.append(bytes((_VALUE_INT,)) + struct.pack("<q", value))
+        elif isinstance(value, float):
+            self.parts.append(bytes((_VALUE_FLOAT,)) + struct.pack("<d", value))
+        else:
+            # Colores, archivos y demás tipos de propiedad de Tiled se guardan como texto
+            self.parts.append(bytes((_VALUE_STR,)))
+            self.string(str(value))
+
+    def data(self):
+        return b"".join(self.parts)
+
+
+class _CacheReader:
+    """Lee lo que escribe _CacheWriter; un archivo truncado o inválido lanza ValueError/struct.error."""
+    def __init__(self, data, offset=0):
+        self.data = memoryview(data)
+        self.offset = offset
+
+    def _take(self, size):
+        if self.offset + size > len(self.data):
+            raise ValueError("caché truncada")
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def unpack(self, record):
+        return record.unpack(self._take(record.size))
+
+    def count(self):
+        return self.unpack(_COUNT)[0]
+
+    def string(self):
+        return str(self._take(self.unpack(_STRING)[0]), "utf-8")
+
+    def _array(self, typecode):
+        data = array(typecode)
+        data.frombytes(self._take(self.count() * data.itemsize))
+        if sys.byteorder != "little":
+            data.byteswap()
+        return data
+
+    def uints(self):
+        return self._array("I")
+
+    def ints(self):
+        return self._array("i")
+
+    def value(self):
+        tag = self._take(1)[0]
+        if tag == _VALUE_NONE:
+            return None
+        if tag == _VALUE_BOOL:
+            return bool(self._take(1)[0])
+        if tag == _VALUE_INT:
+            return struct.unpack("<q", self._take(8))[0]
+        if tag == _VALUE_FLOAT:
+            return struct.unpack("<d", self._take(8))[0]
+        if tag == _VALUE_STR:
+            return self.string()
+        raise ValueError("valor de propiedad desconocido")
+
+
+def _number(is_float, value):
+    return value if is_float else int(value)
+
+
+def _encode(compiled):
+    w = _CacheWriter()
+    w.count(len(compiled["sources"]))
+    for path, mtime_ns, size, sha1 in compiled["sources"]:
+        w.string(path)
+        w.pack(_SOURCE, mtime_ns, size, bytes.fromhex(sha1))
+
+    w.pack(_MAP, compiled["width"], compiled["height"], compiled["tilewidth"], compiled["tileheight"],
+           compiled["source_collision_count"])
+
+    w.count(len(compiled["layers"]))
+    for layer in compiled["layers"]:
+        w.string(layer["name"])
+        w.pack(_LAYER, layer["width"], layer["height"], layer["visible"],
+               layer["parallax_x"], layer["parallax_y"])
+        w.count(len(layer["properties"]))
+        for key, value in layer["properties"].items():
+            w.string(str(key))
+            w.value(value)
+        w.uints(layer["gids"])
+
+    # Las rutas de imagen se guardan una vez; cada tile apunta a su índice
+    images = sorted({tile[0] for tile in compiled["tiles"] if tile is not None})
+    image_index = {path: i for i, path in enumerate(images)}
+    w.count(len(images))
+    for path in images:
+        w.string(path)
+        w.value(compiled["colorkeys"].get(path))
+    w.count(len(compiled["tiles"]))
+    for tile in compiled["tiles"]:
+        if tile is None:
+            w.pack(_TILE, 0, 0, 0, 0, 0, 0)
+        else:
+            # Bits 0-1: 0 vacío, 1 con rect, 2 imagen entera; bits 2-4: flip_h, flip_v, flip_d
+            source, rect, (flip_h, flip_v, flip_d) = tile
+            kind = (1 if rect else 2) | flip_h << 2 | flip_v << 3 | flip_d << 4
+            w.pack(_TILE, kind, image_index[source], *(rect or (0, 0, 0, 0)))
+
+    w.count(len(compiled["animations"]))
+    for gid, frames in compiled["animations"].items():
+        w.pack(_COUNT, gid)
+        w.count(len(frames))
+        for frame in frames:
+            w.pack(_FRAME, *frame)
+
+    w.ints(value for rect in compiled["collision_rects"] for value in rect)
+    w.pack(_POINT, *compiled["player_spawn"])
+
+    w.count(len(compiled["enemy_spawns"]))
+    for spawn in compiled["enemy_spawns"]:
+        w.pack(_ENEMY_SPAWN, spawn["x"], spawn["y"],
+               isinstance(spawn["speed"], float), spawn["speed"],
+               isinstance(spawn["health"], float), spawn["health"])
+        w.string(spawn["type"])
+
+    w.count(len(compiled["consumable_spawns"]))
+    for spawn in compiled["consumable_spawns"]:
+        sound = spawn["pickup_sound"]
+        w.pack(_CONSUMABLE_SPAWN, spawn["x"], spawn["y"],
+               isinstance(spawn["health_value"], float), spawn["health_value"], sound is not None)
+        w.string(spawn["consumable_type"])
+        if sound is not None:
+            w.string(sound)
+
+    level_end = compiled["level_end"]
+    w.pack(_OPTIONAL_RECT, level_end is not None, *(level_end or (0, 0, 0, 0)))
+    return w.data()
+
+
+def _decode(data, offset):
+    r = _CacheReader(data, offset)
+    sources = []
+    for _ in range(r.count()):
+        path = r.string()
+        mtime_ns, size, sha1 = r.unpack(_SOURCE)
+        sources.append((path, mtime_ns, size, sha1.hex()))
+
+    width, height, tilewidth, tileheight, source_collision_count = r.unpack(_MAP)
+
+    layers = []
+    for _ in range(r.count()):
+        name = r.string()
+        layer_width, layer_height, visible, parallax_x, parallax_y = r.unpack(_LAYER)
+        properties = {}
+        for _ in range(r.count()):
+            key = r.string()
+            properties[key] = r.value()
+        gids = r.uints()
+        if len(gids) != layer_width * layer_height:
+            raise ValueError("capa %r con tamaño inválido" % name)
+        layers.append({
+            "name": name,
+            "width": layer_width,
+            "height": layer_height,
+            "gids": gids,
+            "properties": properties,
+            "visible": visible,
+            "parallax_x": parallax_x,
+            "parallax_y": parallax_y,
+        })
+
+    images = []
+    colorkeys = {}
+    for _ in range(r.count()):
+        path = r.string()
+        trans = r.value()
+        if trans is not None:
+            colorkeys[path] = trans
+        images.append(path)
+    tiles = []
+    for _ in range(r.count()):
+        kind, image, x, y, w, h = r.unpack(_TILE)
+        if kind & 3 == 0:
+            tiles.append(None)
+        else:
+            rect = (x, y, w, h) if kind & 3 == 1 else None
+            flags = (bool(kind & 4), bool(kind & 8), bool(kind & 16))
+            tiles.append((images[image], rect, flags))
+
+    animations = {}
+    for _ in range(r.count()):
+        gid = r.count()
+        animations[gid] = [r.unpack(_FRAME) for _ in range(r.count())]
+
+    values = r.ints()
+    collision_rects = [tuple(values[i:i + 4]) for i in range(0, len(values), 4)]
+    player_spawn = r.unpack(_POINT)
+
+    enemy_spawns = []
+    for _ in range(r.count()):
+        x, y, speed_float, speed, health_float, health = r.unpack(_ENEMY_SPAWN)
+        enemy_spawns.append({
+            "x": x,
+            "y": y,
+            "type": r.string(),
+            "speed": _number(speed_float, speed),
+            "health": _number(health_float, health),
+        })
+
+    consumable_spawns = []
+    for _ in range(r.count()):
+        x, y, value_float, health_value, has_sound = r.unpack(_CONSUMABLE_SPAWN)
+        consumable_type = r.string()
+        consumable_spawns.append({
+            "x": x,
+            "y": y,
+            "consumable_type": consumable_type,
+            "health_value": _number(value_float, health_value),
+            "pickup_sound": r.string() if has_sound else None,
+        })
+
+    has_end, *level_end = r.unpack(_OPTIONAL_RECT)
+    if r.offset != len(r.data):
+        raise ValueError("datos sobrantes en la caché")
+
+    return {
+        "sources": sources,
+        "width": width,
+        "height": height,
+        "tilewidth": tilewidth,
+        "tileheight": tileheight,
+        "layers": layers,
+        "tiles": tiles,
+        "animations": animations,
+        "colorkeys": colorkeys,
+        "collision_rects": collision_rects,
+        "source_collision_count": source_collision_count,
+        "player_spawn": player_spawn,
+        "enemy_spawns": enemy_spawns,
+        "consumable_spawns": consumable_spawns,
+        "level_end": tuple(level_end) if has_end else None,
+    }
+
+
+def write_cache(cache_path, compiled):
+    data = _HEADER.pack(CACHE_MAGIC, CACHE_VERSION) + _encode(compiled)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, cache_path)
+
+
+def read_cache(cache_path):
+    """Devuelve el nivel compilado o None si el archivo no existe o no es válido."""
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version = _HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        return None
+    try:
+        return _decode(data, _HEADER.size)
+    except (ValueError, IndexError, struct.error):
+        return None
+
+
+def check_sources(compiled):
+    """
+    Comprueba que los archivos fuente no han cambiado. Primero mira fecha y
+    tamaño; si no coinciden (p. ej. tras un checkout) compara el hash del contenido.
+    Devuelve None si la caché está obsoleta, o la lista de firmas actualizada.
+    """
+    sources = []
+    for path, mtime_ns, size, sha1 in compiled["sources"]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+            if stat.st_size != size or _file_sha1(path) != sha1:
+                return None
+        sources.append((path, stat.st_mtime_ns, stat.st_size, sha1))
+    return sources
+
+
+def load_level(tmx_path, load_images=True):
+    """
+    Devuelve el LevelData del mapa, compilándolo y guardando la caché sólo si
+    no existe o está desactualizada.
+    """
+    cache_path = cache_path_for(tmx_path)
+    compiled = read_cache(cache_path)
+    sources = check_sources(compiled) if compiled is not None else None
+    if sources is None:
+        compiled = compile_level(tmx_path)
+    elif sources == compiled["sources"]:
+        cache_path = None  # Caché al día, no hace falta reescribirla
+    else:
+        # Mismo contenido con otra fecha: sólo se actualizan las firmas
+        compiled["sources"] = sources
+
+    if cache_path is not None:
+        try:
+            write_cache(cache_path, compiled)
+        except OSError:
+            # Carpeta de sólo lectura (p. ej. el ejecutable empaquetado): seguimos sin caché
+            pass
+        except (struct.error, TypeError, ValueError):
+            # Valores que el formato de la caché no puede guardar (p. ej. una
+            # propiedad numérica con texto): se usa el nivel recién compilado
+            pass
+
+    level = LevelData(
+        tmx_path,
+        compiled["width"],
+        compiled["height"],
+        compiled["tilewidth"],
+        compiled["tileheight"],
+        [LevelLayer(**layer) for layer in compiled["layers"]],
+        compiled["tiles"],
+        compiled["collision_rects"],
+        compiled["player_spawn"],
+        compiled["enemy_spawns"],
+        compiled["consumable_spawns"],
+        compiled["level_end"],
+        compiled["animations"],
+        compiled["source_collision_count"],
+        compiled["colorkeys"],
+    )
+    if load_images:
+        level.load_images()
+    return level
@@ -0,0 +1,68 @@
+# level_preloader.py
+import threading
+
+# Distancia (en píxeles) al objeto LevelEnd a partir de la cual se empieza a precargar
+PRELOAD_DISTANCE = 800
+
+
+def distance_to_rect(rect, target_rect):
+    """Distancia del centro de 'rect' al punto más cercano de 'target_rect' (0 si está dentro)."""
+    x, y = rect.center
+    dx = max(target_rect.left - x, 0, x - target_rect.right)
+    dy = max(target_rect.top - y, 0, y - target_rect.bottom)
+    return (dx * dx + dy * dy) ** 0.5
+
+
+class LevelPreloader:
+    """
+    Carga el siguiente nivel en un hilo en segundo plano.
+
+    'loader' es la función que construye el nivel a partir de la ruta del TMX
+    (mapa, superficies, spawns, enemigos...). La carga empieza cuando el
+    jugador se acerca a menos de 'trigger_distance' del final del nivel; al
+    llegar al final, get() devuelve el resultado ya listo o, si aún no ha
+    terminado, espera al hilo o carga de forma síncrona.
+    """
+    def __init__(self, loader, tmx_path, trigger_distance=PRELOAD_DISTANCE):
+        self.loader = loader
+        self.tmx_path = tmx_path
+        self.trigger_distance = trigger_distance
+        self.thread = None
+        self.result = None
+        self.error = None
+
+    @property
+    def started(self):
+        return self.thread is not None
+
+    @property
+    def ready(self):
+        return self.result is not None
+
+    def update(self, player_rect, level_end_rect):
+        """Arranca la precarga si el jugador está lo bastante cerca del final."""
+        if self.started or level_end_rect is None:
+            return
+        if distance_to_rect(player_rect, level_end_rect) <= self.trigger_distance:
+            self.start()
+
+    def start(self):
+        if self.started:
+            return
+        self.thread = threading.Thread(target=self._run, name="LevelPreloader", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            self.result = self.loader(self.tmx_path)
+        except Exception as e:
+            # Se guarda el error; get() volverá a intentarlo de forma síncrona
+            self.error = e
+
+    def get(self):
+        """Devuelve el nivel precargado; si la precarga no está lista, lo carga ahora."""
+        if self.thread is not None:
+            self.thread.join()
+        if self.result is None:
+            self.result = self.loader(self.tmx_path)
+        return self.result
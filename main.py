@@ -1,3 +1,5 @@
+import os
+import random
 import pygame
 import time  # Para usar time.time() si lo necesitas
 from screens import (
@@ -7,20 +9,16 @@ from screens import (
     show_pause_menu,
     show_config_screen
 )
-from tilemap import (
-    load_map,
-    draw_tiled_map,
-    get_player_spawn,
-    get_collision_rects,
-    get_enemy_spawns,
-    get_consumable_spawns,
-    get_level_end
-)
-from player import Player
-from camera import Camera
-from intro import show_intro_scenes
-from enemies import Enemy
-from consumable import Consumable
+from tilemap import draw_tiled_map
+from intro import INTRO_SCENES, show_intro_scenes
+from image_prefetch import ImagePrefetcher
+from game_session import GameSession, load_level_state
+from level_preloader import LevelPreloader, PRELOAD_DISTANCE
+from timestep import SimulationClock, FixedTimestep, interpolate_rect
+from replay import InputRecorder, REPLAY_SEED
+import asset_cache
+import audio
+import render_backend
 
 # Importar desde dialog.py
 from dialog import show_dialog_with_name
@@ -36,30 +34,21 @@ NEXT_TMX_MAP_PATH = "assets/tilemaps/level2_1.tmx"
 LOGO_1 = "assets/logo/logoUTCJ.png"
 LOGO_2 = "assets/logo/logo.png"
 
+# Tamaño de la ventana
+SCREEN_SIZE = (640, 480)
 
-def fade_music(new_music, fade_time=2000):
-    """Realiza un fade entre la música actual y la nueva."""
-    current_music = pygame.mixer.music.get_busy()
-    if current_music:
-        current_volume = pygame.mixer.music.get_volume()
-        for volume in range(int(current_volume * 100), 0, -5):
-            pygame.mixer.music.set_volume(volume / 100)
-            pygame.time.delay(fade_time // 20)
+# Límite de fps del dibujado (0 = sin límite). La simulación va siempre a timestep.SIM_RATE
+MAX_RENDER_FPS = 144
 
-    pygame.mixer.music.load(new_music)
-    pygame.mixer.music.set_volume(0)
-    pygame.mixer.music.play(-1)
-    for volume in range(0, 101, 5):
-        pygame.mixer.music.set_volume(volume / 100)
-        pygame.time.delay(fade_time // 20)
+# Si se define, la entrada de la partida se graba en este archivo (ver replay.py)
+RECORD_INPUT_PATH = os.environ.get("UNMEI_RECORD_INPUT")
 
 
-def show_logo(screen, logo_path, fade_in_time=2000, display_time=4000, fade_out_time=2000):
-    """Muestra un logo con efecto de fade-in y fade-out manteniendo su relación de aspecto."""
-    logo = pygame.image.load(logo_path).convert_alpha()
-    original_width, original_height = logo.get_size()
-    max_width = screen.get_width() * 0.6
-    max_height = screen.get_height() * 0.6
+def logo_display_size(image_size, screen_size):
+    """Tamaño del logo en pantalla: como mucho el 60% de la pantalla, manteniendo la relación de aspecto."""
+    original_width, original_height = image_size
+    max_width = screen_size[0] * 0.6
+    max_height = screen_size[1] * 0.6
     aspect_ratio = original_width / original_height
 
     # Ajuste de tamaño si sobrepasa el 60% de la pantalla
@@ -72,8 +61,31 @@ def show_logo(screen, logo_path, fade_in_time=2000, display_time=4000, fade_out_
             new_width = int(new_height * aspect_ratio)
     else:
         new_width, new_height = original_width, original_height
+    return new_width, new_height
+
+
+def logo_scale(screen):
+    """Escala de los logos para image_prefetch (depende del tamaño original de cada uno)."""
+    return lambda image_size: logo_display_size(image_size, screen.get_size())
 
-    logo = pygame.transform.scale(logo, (new_width, new_height))
+
+def startup_prefetcher(screen):
+    """Precarga en segundo plano los logos, el fondo del menú y las escenas de la intro, en orden."""
+    prefetcher = ImagePrefetcher()
+    for logo in (LOGO_1, LOGO_2):
+        prefetcher.add(logo, logo_scale(screen), alpha=True)
+    prefetcher.add(BACKGROUND_IMAGE, SCREEN_SIZE)
+    for scene in INTRO_SCENES:
+        prefetcher.add(scene["image"], screen.get_size())
+    prefetcher.start()
+    return prefetcher
+
+
+def show_logo(screen, logo_path, fade_in_time=2000, display_time=4000, fade_out_time=2000, prefetcher=None):
+    """Muestra un logo con efecto de fade-in y fade-out manteniendo su relación de aspecto."""
+    if prefetcher is None:
+        prefetcher = ImagePrefetcher()
+    logo, logo_key = prefetcher.get(logo_path, logo_scale(screen), alpha=True)
     rect = logo.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
 
     # Fade in
@@ -81,7 +93,8 @@ def show_logo(screen, logo_path, fade_in_time=2000, display_time=4000, fade_out_
         screen.fill((0, 0, 0))
         logo.set_alpha(alpha)
         screen.blit(logo, rect)
-        pygame.display.update()
+        render_backend.flip()
+        audio.update()
         pygame.time.delay(fade_in_time // 50)
 
     # Mostrar el logo por un tiempo
@@ -92,95 +105,119 @@ def show_logo(screen, logo_path, fade_in_time=2000, display_time=4000, fade_out_
         screen.fill((0, 0, 0))
         logo.set_alpha(alpha)
         screen.blit(logo, rect)
-        pygame.display.update()
+        render_backend.flip()
+        audio.update()
         pygame.time.delay(fade_out_time // 50)
 
+    # La imagen es compartida: se deja sin transparencia
+    logo.set_alpha(None)
+    asset_cache.release(logo_key)
+
+
+def draw_world(target, tmx_data, camera, player, enemies, consumables, alpha=1.0, time_ms=None):
+    """
+    Dibuja el mapa y los sprites del nivel en 'target', que puede ser la
+    pantalla o el backend de texturas (ver render_backend.py). Cámara,
+    jugador y enemigos se dibujan interpolados entre el tick anterior y el
+    actual según 'alpha'; 'time_ms' es el tiempo de simulación para los
+    tiles animados.
+    """
+    view = camera.interpolated(alpha)
+    draw_tiled_map(target, tmx_data, view.x, view.y, time_ms)
+    player_rect = interpolate_rect(player.rect, player.previous_topleft, alpha)
+    if player.image_mirrored:
+        render_backend.blit_mirrored(target, player.image, view.apply(player_rect))
+    else:
+        target.blit(player.image, view.apply(player_rect))
+    if not player.dead:
+        player.draw_health_bar(target, view, player_rect)
+
+    for enemy in enemies:
+        enemy_rect = interpolate_rect(enemy.rect, enemy.previous_topleft, alpha)
+        target.blit(enemy.image, view.apply(enemy_rect))
+
+    # Mientras se ve la animación de muerte no se dibujan los consumibles
+    if player.dead:
+        return
+
+    for cons in consumables:
+        target.blit(cons.image, view.apply(cons.rect))
+
+    # Rectángulo de ataque (depuración)
+    if player.attack_rect:
+        attack_rect_camera = view.apply(player.attack_rect)
+        render_backend.draw_rect(target, (255, 0, 0), attack_rect_camera, 2)
+
 
 def main():
     pygame.init()
-    screen = pygame.display.set_mode((640, 480))
-    pygame.display.set_caption("Unmei Gisei - 640x480")
+    backend = render_backend.init_display(SCREEN_SIZE, "Unmei Gisei - 640x480")
+    # 'screen' es el lienzo de menús, diálogos e intro; 'target' es donde se dibuja el juego
+    screen = backend.canvas
+    target = backend.target
 
-    # Sistema de audio
+    # Mientras se muestra cada imagen se van cargando las siguientes
+    prefetcher = startup_prefetcher(screen)
+
+    # Sistema de audio. Las transiciones de música avanzan con audio.update() en cada frame
     pygame.mixer.init()
-    pygame.mixer.music.load(BACKGROUND_MUSIC)
-    pygame.mixer.music.set_volume(0.5)
-    pygame.mixer.music.play(-1)
+    audio.music.play(BACKGROUND_MUSIC, fade_ms=0)
 
     # Mostrar logos
-    show_logo(screen, LOGO_1)
-    show_logo(screen, LOGO_2)
+    show_logo(screen, LOGO_1, prefetcher=prefetcher)
+    show_logo(screen, LOGO_2, prefetcher=prefetcher)
 
     # Menú principal
-    background = pygame.transform.scale(
-        pygame.image.load(BACKGROUND_IMAGE).convert(),
-        (640, 480)
-    )
-    if not show_menu(screen, background):
+    background, background_key = prefetcher.get(BACKGROUND_IMAGE, SCREEN_SIZE)
+    start_game = show_menu(screen, background)
+    # El fondo sólo se usa en el menú principal
+    asset_cache.release(background_key)
+    del background
+    if not start_game:
+        prefetcher.close()
         pygame.quit()
         return
 
+    # La música cambia mientras la pantalla se funde a negro
+    audio.music.play(INTRO_MUSIC, 2000)
     fade_out(screen, 2000)
-    fade_music(INTRO_MUSIC, 2000)
 
-    if not show_intro_scenes(screen):
+    intro_finished = show_intro_scenes(screen, prefetcher)
+    prefetcher.close()
+    if not intro_finished:
         pygame.quit()
         return
 
-    fade_music(GAME_MUSIC, 2000)
-
-    # Cargar el primer nivel
-    tmx_data = load_map(TMX_MAP_PATH)
-    camera = Camera(
-        tmx_data.width * tmx_data.tilewidth,
-        tmx_data.height * tmx_data.tileheight,
-        640, 480
-    )
-    map_width = tmx_data.width * tmx_data.tilewidth
-    map_height = tmx_data.height * tmx_data.tileheight
-
-    collision_rects = get_collision_rects(tmx_data)
-    player = Player(*get_player_spawn(tmx_data))
-    player_group = pygame.sprite.GroupSingle(player)
-
-    enemies = pygame.sprite.Group()
-    for enemy_data in get_enemy_spawns(tmx_data):
-        enemies.add(
-            Enemy(
-                x=enemy_data["x"],
-                y=enemy_data["y"],
-                enemy_type=enemy_data["type"],
-                speed=enemy_data["speed"],
-                health=enemy_data["health"]
-            )
-        )
-
-    consumables = pygame.sprite.Group()
-    for cons_data in get_consumable_spawns(tmx_data):
-        consumables.add(
-            Consumable(
-                x=cons_data["x"],
-                y=cons_data["y"],
-                consumable_type=cons_data["consumable_type"],
-                health_value=int(cons_data["health_value"]),
-                pickup_sound=cons_data.get("pickup_sound", None)
-            )
-        )
-
-    level_end_rect = get_level_end(tmx_data)
+    audio.music.play(GAME_MUSIC, 2000)
+
+    # Cargar el primer nivel. La lógica avanza en ticks fijos y todos los
+    # temporizadores de la partida usan sim_clock
+    sim_clock = SimulationClock()
+    timestep = FixedTimestep(sim_clock)
+    recorder = None
+    if RECORD_INPUT_PATH:
+        # Misma semilla que usará la reproducción
+        random.seed(REPLAY_SEED)
+        recorder = InputRecorder(TMX_MAP_PATH)
+    session = GameSession(load_level_state(TMX_MAP_PATH), sim_clock)
+    player = session.player
+
+    # El siguiente nivel se carga en segundo plano al acercarse al final
+    next_level = LevelPreloader(load_level_state, NEXT_TMX_MAP_PATH, PRELOAD_DISTANCE)
 
     clock = pygame.time.Clock()
     running = True
 
-    # Para medir daño gradual
-    health_decrease_rate = 1
-    last_health_decrease = pygame.time.get_ticks()
-
-    # Para controlar pantalla de muerte (tras animación)
-    death_screen_start_time = None
-    death_screen_delay = 2  # Segundos que se mostrará "Has muerto"
+    def redraw_world(surface):
+        # Vuelve a dibujar el frame actual (lo necesita el backend de texturas para capturarlo)
+        surface.fill((0, 0, 0))
+        draw_world(surface, session.tmx_data, session.camera, player, session.enemies,
+                   session.consumables, timestep.alpha, sim_clock.time_ms)
 
     while running:
+        # Tiempo real del último frame; la simulación lo consume en ticks fijos
+        frame_seconds = clock.tick(MAX_RENDER_FPS) / 1000.0
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
@@ -191,7 +228,7 @@ def main():
         keys = pygame.key.get_pressed()
         if keys[pygame.K_p]:
             # Hacemos una "foto" del juego en este momento
-            pause_background = screen.copy()
+            pause_background = backend.capture(redraw_world).copy()
             # Mostramos el menú de pausa
             result = show_pause_menu(screen, pause_background)
             if result == "resume":
@@ -202,131 +239,71 @@ def main():
             elif result == "exit":
                 # Salir del juego (o podrías volver al menú principal)
                 running = False
-
-        # Acciones de jugador (ATAQUE, etc.)
-        if keys[pygame.K_e]:
-            player.attack()
-
-        # Lógica de jugador y enemigos
-        player.update(collision_rects, enemies, map_width, map_height)
-        camera.update(player.rect)
-        enemies.update(collision_rects)
-
-        # Disminuir salud cada segundo
-        current_time = pygame.time.get_ticks()
-        if current_time - last_health_decrease >= 1000:
-            player.take_damage(health_decrease_rate)
-            last_health_decrease = current_time
-
-        # Consumibles
-        consumable_hits = pygame.sprite.spritecollide(player, consumables, True)
-        for cons in consumable_hits:
-            player.health = min(player.max_health, player.health + int(cons.health_value))
-
-        # Fin de nivel
-        if level_end_rect and player.rect.colliderect(level_end_rect):
-            show_dialog_with_name(screen, "Athelia", "Por fin llegamos… cada paso ha dejado huella en ti.")
-            show_dialog_with_name(screen, "Protagonista", "Estoy agotado; la oscuridad y los combates me han drenado.")
-            show_dialog_with_name(screen, "Protagonista", "Sin alimentarme, mi energía se desvanece. ¿Cómo podré encontrar fuerzas para atacar?")
-            show_dialog_with_name(screen, "Athelia", "Ataca sin miedo, pero nunca olvides cuidar de ti. Una buena ración es tan vital como un golpe certero.")
-
-            # Cargar siguiente nivel
-            tmx_data = load_map(NEXT_TMX_MAP_PATH)
-            camera = Camera(
-                tmx_data.width * tmx_data.tilewidth,
-                tmx_data.height * tmx_data.tileheight,
-                640, 480
-            )
-            map_width = tmx_data.width * tmx_data.tilewidth
-            map_height = tmx_data.height * tmx_data.tileheight
-            collision_rects = get_collision_rects(tmx_data)
-            player.rect.topleft = get_player_spawn(tmx_data)
-
-            enemies.empty()
-            for enemy_data in get_enemy_spawns(tmx_data):
-                enemies.add(
-                    Enemy(
-                        x=enemy_data["x"],
-                        y=enemy_data["y"],
-                        enemy_type=enemy_data["type"],
-                        speed=enemy_data["speed"],
-                        health=enemy_data["health"]
-                    )
-                )
-
-            consumables.empty()
-            for cons_data in get_consumable_spawns(tmx_data):
-                consumables.add(
-                    Consumable(
-                        x=cons_data["x"],
-                        y=cons_data["y"],
-                        consumable_type=cons_data["consumable_type"],
-                        health_value=int(cons_data["health_value"]),
-                        pickup_sound=cons_data.get("pickup_sound", None)
-                    )
-                )
-            level_end_rect = get_level_end(tmx_data)
+            # El tiempo pasado en el menú no cuenta para la simulación
+            clock.tick()
+            timestep.reset()
+
+        for _ in range(timestep.advance(frame_seconds)):
+            # Lógica de jugador, enemigos, consumibles y temporizadores (game_session.py)
+            if recorder:
+                recorder.record(keys)
+            reached_end = session.step(keys)
+            next_level.update(player.rect, session.level_end_rect)
+
+            # Fin de nivel
+            if reached_end:
+                # Los diálogos usan la pantalla actual como fondo
+                backend.capture(redraw_world)
+                show_dialog_with_name(screen, "Athelia", "Por fin llegamos… cada paso ha dejado huella en ti.")
+                show_dialog_with_name(screen, "Protagonista", "Estoy agotado; la oscuridad y los combates me han drenado.")
+                show_dialog_with_name(screen, "Protagonista", "Sin alimentarme, mi energía se desvanece. ¿Cómo podré encontrar fuerzas para atacar?")
+                show_dialog_with_name(screen, "Athelia", "Ataca sin miedo, pero nunca olvides cuidar de ti. Una buena ración es tan vital como un golpe certero.")
+
+                # Cambiar al siguiente nivel (ya precargado si el hilo terminó a tiempo)
+                session.load_level(next_level.get())
+                if recorder:
+                    recorder.level_started(NEXT_TMX_MAP_PATH)
+                next_level = LevelPreloader(load_level_state, NEXT_TMX_MAP_PATH, PRELOAD_DISTANCE)
+                # Los diálogos y la carga no cuentan como tiempo de simulación
+                clock.tick()
+                timestep.reset()
+                break
 
         # ========================
         #   RENDERIZADO (DRAW)
         # ========================
-        screen.fill((0, 0, 0))
+        target.fill((0, 0, 0))
+
+        alpha = timestep.alpha
 
         # 1) Jugador vivo
         if not player.dead:
             # Se dibuja el juego normalmente
-            draw_tiled_map(screen, tmx_data, camera.x, camera.y)
-            screen.blit(player.image, camera.apply(player.rect))
-            player.draw_health_bar(screen, camera)
-
-            for enemy in enemies:
-                screen.blit(enemy.image, camera.apply(enemy.rect))
-
-            for cons in consumables:
-                screen.blit(cons.image, camera.apply(cons.rect))
-
-            # Rectángulo de ataque (depuración)
-            if player.attack_rect:
-                attack_rect_camera = camera.apply(player.attack_rect)
-                pygame.draw.rect(screen, (255, 0, 0), attack_rect_camera, 2)
-
-            # Si el jugador vuelve a estar vivo, reseteamos el tiempo de pantalla de muerte
-            death_screen_start_time = None
+            draw_world(target, session.tmx_data, session.camera, player, session.enemies,
+                       session.consumables, alpha, sim_clock.time_ms)
 
         # 2) Jugador muerto pero animación NO termina
         elif not player.death_animation_finished:
             # Se dibuja el juego para que se aprecie la animación de muerte
-            draw_tiled_map(screen, tmx_data, camera.x, camera.y)
-            screen.blit(player.image, camera.apply(player.rect))
-
-            # Si quieres que los enemigos sigan dibujándose, lo dejas
-            for enemy in enemies:
-                screen.blit(enemy.image, camera.apply(enemy.rect))
+            draw_world(target, session.tmx_data, session.camera, player, session.enemies,
+                       session.consumables, alpha, sim_clock.time_ms)
 
         # 3) Jugador muerto y animación terminada
         else:
             # Pantalla negra y texto “¡Has muerto!”
-            font = pygame.font.Font(None, 36)
+            font = asset_cache.load_font(None, 36)
             text_surface = font.render("Este es el sacrificio del destino...", True, (255, 0, 0))
-            text_rect = text_surface.get_rect(center=(screen.get_width()//2,
-                                                      screen.get_height()//2))
-            screen.blit(text_surface, text_rect)
-
-            # Controlar cuánto tiempo se muestra este texto
-            if death_screen_start_time is None:
-                # Primer frame en el que entramos aquí
-                death_screen_start_time = pygame.time.get_ticks()
-            else:
-                elapsed = (pygame.time.get_ticks() - death_screen_start_time) / 1000.0
-                if elapsed >= death_screen_delay:
-                    # Pasados X segundos, hacemos respawn
-                    player.respawn()
-                    # Reiniciamos la variable para la próxima muerte
-                    death_screen_start_time = None
-
-        pygame.display.flip()
-        clock.tick(60)
+            text_rect = text_surface.get_rect(center=(target.get_width()//2,
+                                                      target.get_height()//2))
+            target.blit(text_surface, text_rect)
+
+        backend.present()
+        audio.update()
 
+    if recorder:
+        recorder.save(RECORD_INPUT_PATH)
+    if asset_cache.SHOW_ASSET_STATS:
+        print(asset_cache.format_stats())
     pygame.quit()
 
 
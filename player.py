@@ -1,30 +1,32 @@
 import pygame
-import os
-import time
+
+import asset_cache
+
+# Hoja de sprites del jugador y sus animaciones (ver spritesheet.py)
+PLAYER_SHEET = "assets/cat_m/cat_sheet.json"
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    def __init__(self, x, y, clock):
+        """'clock' es el SimulationClock (timestep.py) con el que se miden todos los temporizadores."""
         super().__init__()
         self.start_pos = (x, y)
+        self.clock = clock
 
-        # Diccionario de animaciones
-        self.animations = {
-            "idle": self.load_frames("assets/cat_m/idle", scale_factor=1),
-            "left": self.load_frames("assets/cat_m/l", scale_factor=1),
-            "right": self.load_frames("assets/cat_m/r", scale_factor=1),
-            "jump_left": self.load_frames("assets/cat_m/jump_left", scale_factor=1),
-            "jump_right": self.load_frames("assets/cat_m/jump_right", scale_factor=1),
-            "death": self.load_frames("assets/cat_m/death", scale_factor=1),
-            "attack_left": self.load_frames("assets/cat_m/attack/left", scale_factor=1),
-            "attack_right": self.load_frames("assets/cat_m/attack/right", scale_factor=1)
-        }
+        # Diccionario de animaciones: frames de la hoja del gato (compartida, ver asset_cache.py)
+        sheet = asset_cache.load_sheet(PLAYER_SHEET)
+        self.animations = dict(sheet.animations)
+        # Las animaciones a la izquierda son las de la derecha reflejadas al dibujar
+        self.mirrored_animations = sheet.mirrored
+        self._assets_retained = True
 
         # Estado inicial
         self.state = "idle"
         self.last_direction = "right"
         self.current_frame = 0
-        self.image = self.animations[self.state][self.current_frame]
+        self.show_frame(self.state, self.current_frame)
         self.rect = self.image.get_rect(topleft=self.start_pos)
+        # Posición del tick anterior, para interpolar al dibujar
+        self.previous_topleft = self.rect.topleft
 
         # Parámetros de movimiento
         self.speed = 4
@@ -44,11 +46,11 @@ class Player(pygame.sprite.Sprite):
         self.animation_speed = 5
 
         # Control de muerte
-        self.death_start_time = None  # Guarda el tiempo en que comienza a "estar muerto"
+        self.death_start_tick = None  # Tick (clock.ticks) en que comienza a "estar muerto"
 
         # Control de ataque
         self.attacking = False
-        self.attack_start_time = None
+        self.attack_start_tick = None
         self.attack_duration = 0.5  # En segundos
         self.attack_has_hit = False
         self.attack_rect = None
@@ -57,41 +59,31 @@ class Player(pygame.sprite.Sprite):
         self.max_health = 100
         self.health = self.max_health
         self.invulnerability_duration = 1.0  # 1 segundo de invulnerabilidad tras recibir daño
-        self.last_damage_time = 0  # Último tiempo de daño
-
-    def load_frames(self, folder, scale_factor=1):
-        """Carga y ordena los frames de forma numérica."""
-        frames = []
-        files = os.listdir(folder)
-        # Ordenar los archivos numéricamente (si llevan números en el nombre)
-        files.sort(key=lambda f: int(''.join(filter(str.isdigit, f))) 
-                   if ''.join(filter(str.isdigit, f)) != "" else 0)
-        
-        for filename in files:
-            if filename.endswith(".png"):
-                path = os.path.join(folder, filename)
-                image = pygame.image.load(path).convert_alpha()
-                if scale_factor != 1:
-                    width, height = image.get_size()
-                    new_size = (int(width * scale_factor), int(height * scale_factor))
-                    image = pygame.transform.scale(image, new_size)
-                frames.append(image)
-
-        # Si no se encuentran imágenes, crear un surface vacío para evitar errores
-        return frames if frames else [pygame.Surface((32, 64))]
-
-    def update(self, collision_rects, enemy_group, map_width, map_height):
+        self.last_damage_tick = -clock.ticks_for(self.invulnerability_duration)  # Tick del último daño
+
+    def release_assets(self):
+        """Deja de retener las animaciones en la caché de recursos (el jugador ya no se va a usar)."""
+        if self._assets_retained:
+            asset_cache.release(asset_cache.sheet_key(PLAYER_SHEET))
+            self._assets_retained = False
+
+    def update(self, collision_index, enemy_index, map_width, map_height, keys=None):
         """
         Actualiza la lógica del jugador: movimiento, colisiones, ataque,
-        daño recibido, animación y muerte.
+        daño recibido, animación y muerte. 'collision_index' es el
+        SpatialHash con las colisiones estáticas del nivel y 'enemy_index'
+        el SpriteGrid de los enemigos. Se llama una vez por tick de simulación.
+        'keys' es el estado del teclado para este tick (por defecto, el real).
         """
+        self.previous_topleft = self.rect.topleft
         if self.dead:
             # Si está muerto, manejamos la animación de muerte
             self.handle_death()
             return
 
         # Manejo de Teclado
-        keys = pygame.key.get_pressed()
+        if keys is None:
+            keys = pygame.key.get_pressed()
         self.velocity_x = 0
 
         # Movimiento horizontal
@@ -113,10 +105,16 @@ class Player(pygame.sprite.Sprite):
             self.velocity_y = self.jump_speed
             self.on_ground = False
 
-        # Gravedad y movimiento vertical
+        # Gravedad y movimiento vertical (barrido continuo: no atraviesa plataformas finas)
         self.velocity_y += self.gravity
-        self.rect.y += self.velocity_y
-        self.handle_collisions(collision_rects, "vertical")
+        contact = collision_index.move(self.rect, 0, self.velocity_y)
+        if contact is not None:
+            if contact[1] is not None:
+                if contact[0][1] < 0:
+                    self.on_ground = True
+                self.velocity_y = 0
+            if contact[2]:
+                self.handle_collisions(collision_index, "vertical")
 
         # Animación de salto
         if not self.on_ground:
@@ -126,14 +124,15 @@ class Player(pygame.sprite.Sprite):
                 self.state = "jump_right"
 
         # Verificar colisiones con enemigos (daño por contacto)
-        hits = pygame.sprite.spritecollide(self, enemy_group, False)
+        hits = enemy_index.query(self.rect)
         for enemy in hits:
             damage = getattr(enemy, "damage", 10)  # Asume que el enemigo tiene un atributo damage
             self.take_damage(damage)
 
         # Movimiento horizontal y colisiones
-        self.rect.x += self.velocity_x
-        self.handle_collisions(collision_rects, "horizontal")
+        contact = collision_index.move(self.rect, self.velocity_x, 0)
+        if contact is not None and contact[2]:
+            self.handle_collisions(collision_index, "horizontal")
 
         # Limitar la posición al tamaño del mapa
         if self.rect.left < 0:
@@ -150,13 +149,17 @@ class Player(pygame.sprite.Sprite):
 
         # Manejo del ataque
         if self.attacking:
-            self.handle_attack(enemy_group)
+            self.handle_attack(enemy_index)
         else:
             self.attack_rect = None
 
-    def handle_collisions(self, collision_rects, direction):
-        """Ajusta la posición del jugador al detectar colisiones."""
-        for rect in collision_rects:
+    def handle_collisions(self, collision_index, direction):
+        """
+        Ajusta la posición del jugador si se solapa con algún rect cercano.
+        El movimiento ya se hace con barridos (SpatialHash.move), así que esto
+        sólo corrige los solapamientos que existían antes de moverse.
+        """
+        for rect in collision_index.iter_colliding(self.rect):
             if self.rect.colliderect(rect):
                 if direction == "horizontal":
                     if self.velocity_x > 0:
@@ -172,48 +175,56 @@ class Player(pygame.sprite.Sprite):
                         self.rect.top = rect.bottom
                         self.velocity_y = 0
 
+    def show_frame(self, animation, index):
+        """Pone como imagen el frame 'index' de la animación; image_mirrored indica si se dibuja reflejado."""
+        self.image = self.animations[animation][index]
+        self.image_mirrored = animation in self.mirrored_animations
+
     def animate(self):
         """Actualiza el frame de animación."""
         self.animation_timer += 1
         if self.animation_timer >= self.animation_speed:
             self.animation_timer = 0
             self.current_frame = (self.current_frame + 1) % len(self.animations[self.state])
-            self.image = self.animations[self.state][self.current_frame]
+            self.show_frame(self.state, self.current_frame)
 
     def take_damage(self, amount):
         """
         Resta salud al jugador, considerando un periodo de invulnerabilidad
         para no recibir daño continuo cada frame.
         """
-        current_time = time.time()
-        if current_time - self.last_damage_time < self.invulnerability_duration:
+        current_tick = self.clock.ticks
+        if current_tick - self.last_damage_tick < self.clock.ticks_for(self.invulnerability_duration):
             # Aún en periodo de invulnerabilidad
             return
 
         self.health -= amount
-        self.last_damage_time = current_time
+        self.last_damage_tick = current_tick
 
         # Si la salud llega a cero o menos, se muere
         if self.health <= 0:
             self.health = 0
             self.die()
 
-    def draw_health_bar(self, surface, camera):
+    def draw_health_bar(self, surface, camera, rect=None):
         """
         Dibuja la barra de salud sobre el sprite del jugador.
-        'camera' es un objeto que ajusta la posición según la cámara.
+        'camera' es un objeto que ajusta la posición según la cámara y 'rect'
+        la posición (interpolada) del jugador; por defecto, self.rect.
         """
-        applied_rect = camera.apply(self.rect)
-        bar_width = self.rect.width
+        if rect is None:
+            rect = self.rect
+        applied_rect = camera.apply(rect)
+        bar_width = rect.width
         bar_height = 5
         bar_x = applied_rect.x
         bar_y = applied_rect.y - 10
 
-        # Fondo (rojo)
-        pygame.draw.rect(surface, (255, 0, 0), (bar_x, bar_y, bar_width, bar_height))
+        # Fondo (rojo). Se usa fill para que funcione también con el backend de texturas
+        surface.fill((255, 0, 0), (bar_x, bar_y, bar_width, bar_height))
         # Relleno (verde) según proporción de salud
         fill_width = int(bar_width * (self.health / self.max_health))
-        pygame.draw.rect(surface, (0, 255, 0), (bar_x, bar_y, fill_width, bar_height))
+        surface.fill((0, 255, 0), (bar_x, bar_y, fill_width, bar_height))
 
     def die(self):
         """Inicia la animación de muerte del jugador."""
@@ -223,7 +234,7 @@ class Player(pygame.sprite.Sprite):
             self.state = "death"
             self.current_frame = 0
             self.animation_timer = 0
-            self.death_start_time = time.time()  # Registrar tiempo de muerte
+            self.death_start_tick = self.clock.ticks  # Registrar tick de muerte
 
     def handle_death(self):
         """
@@ -237,18 +248,19 @@ class Player(pygame.sprite.Sprite):
             if self.animation_timer >= self.animation_speed * 2:
                 self.animation_timer = 0
                 self.current_frame += 1
-                self.image = self.animations["death"][self.current_frame]
+                self.show_frame("death", self.current_frame)
         else:
             # Mantener el último frame de la animación
-            self.image = self.animations["death"][-1]
+            self.show_frame("death", -1)
             # Cuando pasen 5 segundos de morir,
             # marcamos la animación como finalizada
-            if (time.time() - self.death_start_time) >= 5:
+            if self.clock.ticks - self.death_start_tick >= self.clock.ticks_for(5):
                 self.death_animation_finished = True
 
     def respawn(self):
         """Reinicia la posición y los parámetros del jugador."""
         self.rect.topleft = self.start_pos
+        self.previous_topleft = self.start_pos
         self.velocity_x = 0
         self.velocity_y = 0
         self.on_ground = False
@@ -256,7 +268,7 @@ class Player(pygame.sprite.Sprite):
         self.death_animation_finished = False
         self.state = "idle"
         self.current_frame = 0
-        self.death_start_time = None
+        self.death_start_tick = None
         self.health = self.max_health  # Recuperar la vida al máximo
 
     def attack(self):
@@ -264,7 +276,7 @@ class Player(pygame.sprite.Sprite):
         if not self.attacking:
             self.attacking = True
             self.attack_has_hit = False
-            self.attack_start_time = time.time()
+            self.attack_start_tick = self.clock.ticks
             # Usar animación de ataque correspondiente a la última dirección
             if self.last_direction == "left":
                 self.state = "attack_left"
@@ -273,7 +285,7 @@ class Player(pygame.sprite.Sprite):
             self.current_frame = 0
             self.animation_timer = 0
 
-    def handle_attack(self, enemy_group):
+    def handle_attack(self, enemy_index):
         """
         Avanza la animación de ataque y crea un rectángulo de ataque
         para dañar enemigos que colisionen con él.
@@ -283,10 +295,10 @@ class Player(pygame.sprite.Sprite):
             if self.animation_timer >= self.animation_speed:
                 self.animation_timer = 0
                 self.current_frame += 1
-                self.image = self.animations[self.state][self.current_frame]
+                self.show_frame(self.state, self.current_frame)
         else:
             # Si ya terminó la animación de ataque, revisar si excedió la duración
-            if time.time() - self.attack_start_time >= self.attack_duration:
+            if self.clock.ticks - self.attack_start_tick >= self.clock.ticks_for(self.attack_duration):
                 self.attacking = False
                 self.state = "idle"
                 self.current_frame = 0
@@ -309,7 +321,6 @@ class Player(pygame.sprite.Sprite):
 
             # Aplicar daño a enemigos sólo una vez por ataque
             if not self.attack_has_hit:
-                for enemy in enemy_group:
-                    if attack_rect.colliderect(enemy.rect):
-                        enemy.take_damage(20)
+                for enemy in enemy_index.query(attack_rect):
+                    enemy.take_damage(20)
                 self.attack_has_hit = True
@@ -0,0 +1,220 @@
+# render_backend.py
+"""
+Backends de dibujado.
+
+- "software" (por defecto): todo se dibuja con Surface.blit sobre la
+  superficie de pantalla, como siempre.
+- "texture": usa pygame._sdl2.video.Renderer. Cada Surface se sube una sola
+  vez como Texture y el compuesto y el escalado a la ventana los hace SDL.
+  Con RENDER_ACCELERATED = False se usa el renderer por software de SDL,
+  que funciona en máquinas sin GPU.
+
+El backend de texturas se comporta como una Surface para lo que usa el juego
+(blit, blits, fill, get_size...), así que draw_tiled_map y los sprites no
+necesitan saber con qué backend dibujan. Los menús, diálogos e intro siguen
+dibujando en una Surface normal ('canvas') y llaman a flip(), que en el
+backend de texturas sube ese lienzo completo de una vez.
+"""
+import os
+import weakref
+
+import pygame
+
+# Se puede cambiar aquí o con las variables de entorno correspondientes
+RENDER_BACKEND = os.environ.get("UNMEI_RENDER_BACKEND", "software")
+RENDER_ACCELERATED = os.environ.get("UNMEI_RENDER_ACCELERATED", "1") != "0"
+
+_active = None
+
+
+class SoftwareBackend:
+    """Dibujado clásico sobre la superficie de pantalla."""
+    name = "software"
+
+    def __init__(self, size, caption):
+        self.canvas = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+        # Donde se dibuja el juego: la propia pantalla
+        self.target = self.canvas
+
+    def flip(self):
+        pygame.display.flip()
+
+    def present(self):
+        pygame.display.flip()
+
+    def capture(self, draw=None):
+        """La pantalla ya contiene el último frame; no hace falta redibujarlo."""
+        return self.canvas
+
+    def toggle_fullscreen(self):
+        pygame.display.toggle_fullscreen()
+
+
+class TextureBackend:
+    """Dibujado con texturas a través de pygame._sdl2.video.Renderer."""
+    name = "texture"
+
+    def __init__(self, size, caption, accelerated=True):
+        from pygame._sdl2.video import Renderer, Texture, Window
+
+        self._texture_class = Texture
+        self.size = tuple(size)
+        self.window = Window(caption, self.size)
+        self.renderer = Renderer(self.window, accelerated=1 if accelerated else 0)
+        # El renderer escala el tamaño lógico al de la ventana
+        self.renderer.logical_size = self.size
+        self.canvas = pygame.Surface(self.size)
+        self.target = self
+        self.fullscreen = False
+
+        # Surface -> Texture; la textura se libera cuando la Surface deja de existir
+        self._textures = weakref.WeakKeyDictionary()
+        self._canvas_texture = None
+
+    # --- Interfaz tipo Surface ---
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def texture_for(self, surface):
+        texture = self._textures.get(surface)
+        if texture is None:
+            texture = self._texture_class.from_surface(self.renderer, surface)
+            self._textures[surface] = texture
+        alpha = surface.get_alpha()
+        texture.alpha = 255 if alpha is None else alpha
+        return texture
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        texture = self.texture_for(source)
+        if area is None:
+            width, height = source.get_size()
+        else:
+            area = pygame.Rect(area)
+            width, height = area.size
+        dstrect = pygame.Rect(dest[0], dest[1], width, height)
+        texture.draw(srcrect=area, dstrect=dstrect)
+        return dstrect
+
+    def blit_mirrored(self, source, dest):
+        texture = self.texture_for(source)
+        dstrect = pygame.Rect(dest[0], dest[1], *source.get_size())
+        texture.draw(dstrect=dstrect, flip_x=True)
+        return dstrect
+
+    def blits(self, blit_sequence, doreturn=True):
+        rects = [self.blit(*item) for item in blit_sequence]
+        return rects if doreturn else None
+
+    def fill(self, color, rect=None, special_flags=0):
+        self.renderer.draw_color = pygame.Color(color)
+        if rect is None:
+            self.renderer.clear()
+        else:
+            self.renderer.fill_rect(pygame.Rect(rect))
+
+    def draw_rect(self, color, rect, width=0):
+        self.renderer.draw_color = pygame.Color(color)
+        rect = pygame.Rect(rect)
+        if width == 0:
+            self.renderer.fill_rect(rect)
+        else:
+            for i in range(width):
+                self.renderer.draw_rect(rect.inflate(-2 * i, -2 * i))
+
+    # --- Presentación ---
+
+    def present(self):
+        self.renderer.present()
+
+    def flip(self):
+        """Sube el lienzo (menús, diálogos, intro) como una sola textura y lo presenta."""
+        if self._canvas_texture is None:
+            self._canvas_texture = self._texture_class(self.renderer, self.size, streaming=True)
+        self._canvas_texture.update(self.canvas)
+        self.renderer.draw_color = (0, 0, 0, 255)
+        self.renderer.clear()
+        self._canvas_texture.draw()
+        self.renderer.present()
+
+    def capture(self, draw=None):
+        """
+        Copia al lienzo el frame de juego, para los menús y diálogos que lo
+        usan de fondo. 'draw' vuelve a dibujar el frame, porque tras present()
+        el contenido del renderer no está definido.
+        """
+        if draw is not None:
+            draw(self)
+        self.renderer.to_surface(self.canvas)
+        return self.canvas
+
+    def toggle_fullscreen(self):
+        self.fullscreen = not self.fullscreen
+        if self.fullscreen:
+            self.window.set_fullscreen(desktop=True)
+        else:
+            self.window.set_windowed()
+
+
+def init_display(size, caption, backend=RENDER_BACKEND, accelerated=RENDER_ACCELERATED):
+    """Crea la ventana con el backend elegido y lo deja como backend activo."""
+    global _active
+    if backend == "texture":
+        _active = TextureBackend(size, caption, accelerated)
+    else:
+        _active = SoftwareBackend(size, caption)
+    return _active
+
+
+def get_backend():
+    return _active
+
+
+def flip():
+    """Presenta el lienzo; sustituye a pygame.display.flip() en menús y escenas."""
+    if _active is None:
+        pygame.display.flip()
+    else:
+        _active.flip()
+
+
+def toggle_fullscreen():
+    if _active is None:
+        pygame.display.toggle_fullscreen()
+    else:
+        _active.toggle_fullscreen()
+
+
+def draw_rect(target, color, rect, width=0):
+    """pygame.draw.rect que también funciona sobre el backend de texturas."""
+    if isinstance(target, pygame.Surface):
+        pygame.draw.rect(target, color, rect, width)
+    else:
+        target.draw_rect(color, rect, width)
+
+
+def blit_mirrored(target, source, dest):
+    """
+    Dibuja 'source' reflejada en horizontal sin guardar una copia reflejada:
+    con texturas el reflejo lo hace SDL al copiar.
+    """
+    if isinstance(target, pygame.Surface):
+        return target.blit(pygame.transform.flip(source, True, False), dest)
+    return target.blit_mirrored(source, dest)
+
+
+def convert(surface, alpha=False):
+    """
+    convert()/convert_alpha() cuando hay superficie de pantalla. Con el backend
+    de texturas no la hay, y SDL convierte la imagen al crear la textura.
+    """
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
@@ -0,0 +1,274 @@
+# replay.py
+"""
+Grabación y reproducción de partidas para medir el rendimiento.
+
+InputRecorder guarda, tick a tick, las teclas que lee la simulación (sólo
+las de RECORDED_KEYS) en un archivo binario compacto: cada tick es una
+máscara de bits y los ticks iguales seguidos se guardan como un único
+tramo. Junto a la entrada se guardan la semilla aleatoria y los mapas
+jugados, en orden.
+
+La reproducción pasa la entrada grabada por el mismo camino que el juego
+(game_session.GameSession.step y main.draw_world), con la misma semilla y
+un tick por frame, así que dos reproducciones del mismo archivo simulan
+exactamente lo mismo. Al terminar muestra las estadísticas de tiempo de
+actualización y de frame.
+
+Uso:
+    python replay.py play partida.rec [--no-render]
+    python replay.py record partida.rec [--map mapa.tmx] [--script guion.txt] [--ticks N]
+
+Para grabar una partida jugada, arrancar el juego con
+UNMEI_RECORD_INPUT=partida.rec (ver main.py).
+"""
+import argparse
+import os
+import random
+import struct
+import time
+
+import pygame
+
+from game_session import GameSession, load_level_state
+from input_source import NullInput, ScriptedInput, key_code
+from timestep import SimulationClock
+
+# Teclas que lee la simulación (el resto, como la pausa, no afecta a la partida)
+RECORDED_KEYS = ("a", "d", "space", "e")
+# Semilla de random para las partidas grabadas
+REPLAY_SEED = 0
+
+_MAGIC = b"UGREC"
+_VERSION = 1
+_HEADER = struct.Struct("<5sBII")   # magia, versión, semilla, ticks
+_RUN = struct.Struct("<IH")         # ticks del tramo, máscara de teclas
+
+
+class InputRecorder:
+    """
+    Graba la entrada de cada tick. record() se llama una vez por tick con el
+    mismo estado de teclado que recibe GameSession.step; level_started() al
+    cambiar de mapa.
+    """
+    def __init__(self, tmx_path, seed=REPLAY_SEED, key_names=RECORDED_KEYS):
+        self.seed = seed
+        self.key_names = tuple(key_names)
+        self._codes = [key_code(name) for name in self.key_names]
+        self.maps = [tmx_path]
+        self.ticks = 0
+        # Tramos [máscara, ticks]
+        self.runs = []
+
+    def record(self, keys):
+        mask = 0
+        for bit, code in enumerate(self._codes):
+            if keys[code]:
+                mask |= 1 << bit
+        if self.runs and self.runs[-1][0] == mask:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([mask, 1])
+        self.ticks += 1
+
+    def level_started(self, tmx_path):
+        self.maps.append(tmx_path)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.seed, self.ticks))
+            _write_strings(f, self.key_names)
+            _write_strings(f, self.maps)
+            f.write(struct.pack("<I", len(self.runs)))
+            for mask, length in self.runs:
+                f.write(_RUN.pack(length, mask))
+
+
+def _write_strings(f, strings):
+    f.write(struct.pack("<B", len(strings)))
+    for s in strings:
+        data = s.encode("utf-8")
+        f.write(struct.pack("<H", len(data)))
+        f.write(data)
+
+
+def _read_strings(f):
+    (count,) = struct.unpack("<B", f.read(1))
+    strings = []
+    for _ in range(count):
+        (size,) = struct.unpack("<H", f.read(2))
+        strings.append(f.read(size).decode("utf-8"))
+    return strings
+
+
+class Recording:
+    """Partida grabada: semilla, mapas jugados y entrada tick a tick."""
+    def __init__(self, seed, ticks, key_names, maps, runs):
+        self.seed = seed
+        self.ticks = ticks
+        self.key_names = key_names
+        self.maps = maps
+        self.runs = runs
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, seed, ticks = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError("%s no es una grabación válida" % path)
+            key_names = _read_strings(f)
+            maps = _read_strings(f)
+            (count,) = struct.unpack("<I", f.read(4))
+            data = f.read(count * _RUN.size)
+        runs = [(mask, length) for length, mask in _RUN.iter_unpack(data)]
+        return cls(seed, ticks, key_names, maps, runs)
+
+    def input_source(self):
+        """La entrada grabada como ScriptedInput (un tramo por cada cambio de teclas)."""
+        codes = [key_code(name) for name in self.key_names]
+        segments = []
+        tick = 0
+        for mask, length in self.runs:
+            if mask:
+                keys = [code for bit, code in enumerate(codes) if mask & (1 << bit)]
+                segments.append((tick, tick + length, keys))
+            tick += length
+        return ScriptedInput(segments)
+
+
+def _stats(samples):
+    """Media, percentiles y máximo (en ms) de una lista de tiempos en segundos."""
+    if not samples:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def percentile(p):
+        return ordered[min(last, int(round(p * last)))] * 1000
+
+    return {
+        "mean": sum(ordered) / len(ordered) * 1000,
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": ordered[-1] * 1000,
+    }
+
+
+def play(path, render=True):
+    """
+    Reproduce una grabación y devuelve un diccionario con el resultado y las
+    estadísticas de 'update' (GameSession.step) y 'frame' (step más dibujado).
+    Con render=False no se dibuja nada y sólo se mide la simulación.
+    """
+    recording = Recording.load(path)
+    random.seed(recording.seed)
+
+    pygame.display.init()
+    target = backend = None
+    if render:
+        # Importado aquí: main carga los menús y escenas, que sólo hacen falta para dibujar
+        import render_backend
+        from main import draw_world
+        pygame.font.init()
+        backend = render_backend.init_display((640, 480), "Unmei Gisei - replay")
+        target = backend.target
+
+    clock = SimulationClock()
+    level = 0
+    session = GameSession(load_level_state(recording.maps[level], graphics=render), clock)
+    source = recording.input_source()
+
+    update_times = []
+    frame_times = []
+    completed = False
+    for tick in range(recording.ticks):
+        start = time.perf_counter()
+        reached_end = session.step(source.keys(tick))
+        updated = time.perf_counter()
+        if render:
+            target.fill((0, 0, 0))
+            if not session.showing_death_screen:
+                draw_world(target, session.tmx_data, session.camera, session.player, session.enemies,
+                           session.consumables, 1.0, clock.time_ms)
+            backend.present()
+        end = time.perf_counter()
+        update_times.append(updated - start)
+        frame_times.append(end - start)
+
+        if reached_end:
+            level += 1
+            if level >= len(recording.maps):
+                completed = True
+                break
+            # La carga del siguiente nivel no cuenta en las estadísticas
+            session.load_level(load_level_state(recording.maps[level], graphics=render))
+
+    result = {
+        "maps": recording.maps[:level + 1],
+        "ticks": clock.ticks,
+        "completed": completed,
+        "deaths": session.deaths,
+        "player_position": session.player.rect.topleft,
+        "player_health": session.player.health,
+        "update": _stats(update_times),
+        "frame": _stats(frame_times),
+    }
+    session.close()
+    return result
+
+
+def record(path, tmx_path, source, ticks, seed=REPLAY_SEED):
+    """Graba sin ventana 'ticks' ticks de 'tmx_path' con la entrada de 'source'."""
+    random.seed(seed)
+    pygame.display.init()
+    clock = SimulationClock()
+    session = GameSession(load_level_state(tmx_path, graphics=False), clock)
+    recorder = InputRecorder(tmx_path, seed)
+    for tick in range(ticks):
+        keys = source.keys(tick)
+        recorder.record(keys)
+        if session.step(keys):
+            break
+    recorder.save(path)
+    return recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graba y reproduce partidas para medir el rendimiento.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    play_parser = commands.add_parser("play", help="reproduce una grabación y muestra los tiempos")
+    play_parser.add_argument("recording")
+    play_parser.add_argument("--no-render", action="store_true", help="sólo simular, sin dibujar")
+    record_parser = commands.add_parser("record", help="graba sin ventana a partir de un guion")
+    record_parser.add_argument("recording")
+    record_parser.add_argument("--map", default="assets/tilemaps/level1_1.tmx", help="ruta del TMX")
+    record_parser.add_argument("--script", help="guion de entrada (ver input_source.ScriptedInput.from_file)")
+    record_parser.add_argument("--ticks", type=int, default=3600, help="ticks a grabar")
+    args = parser.parse_args()
+
+    # Sin ventana salvo que se elija otro driver de SDL (p. ej. SDL_VIDEODRIVER=x11)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    if args.command == "record":
+        source = ScriptedInput.from_file(args.script) if args.script else NullInput()
+        recorder = record(args.recording, args.map, source, args.ticks)
+        pygame.quit()
+        print("Grabados %d ticks en %d tramos (%d bytes)"
+              % (recorder.ticks, len(recorder.runs), os.path.getsize(args.recording)))
+        return
+
+    result = play(args.recording, render=not args.no_render)
+    pygame.quit()
+    print("Mapas:           %s" % ", ".join(result["maps"]))
+    print("Ticks:           %d%s" % (result["ticks"], " (completado)" if result["completed"] else ""))
+    print("Muertes:         %d" % result["deaths"])
+    print("Jugador:         %s, salud %d" % (result["player_position"], result["player_health"]))
+    for name in ("update", "frame"):
+        s = result[name]
+        print("%-7s (ms)    media %.3f  p50 %.3f  p95 %.3f  p99 %.3f  máx %.3f"
+              % (name, s["mean"], s["p50"], s["p95"], s["p99"], s["max"]))
+
+
+if __name__ == "__main__":
+    main()
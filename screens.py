@@ -1,13 +1,16 @@
 import pygame
 import sys
 
+import audio
+import render_backend
+
 def show_screen(screen, text, duration=3000, font_size=50):
     screen.fill((0, 0, 0))
     font = pygame.font.Font(None, font_size)
     text_surface = font.render(text, True, (255, 255, 255))
     text_rect = text_surface.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
     screen.blit(text_surface, text_rect)
-    pygame.display.flip()
+    render_backend.flip()
     pygame.time.delay(duration)
 
 def fade_screen(screen, text, fade_time=1500, duration=3500, font_size=50):
@@ -21,7 +24,8 @@ def fade_screen(screen, text, fade_time=1500, duration=3500, font_size=50):
         screen.fill((0, 0, 0))
         text_surface.set_alpha(alpha)
         screen.blit(text_surface, text_rect)
-        pygame.display.flip()
+        render_backend.flip()
+        audio.update()
         clock.tick(30)
 
     pygame.time.delay(duration)
@@ -31,7 +35,8 @@ def fade_screen(screen, text, fade_time=1500, duration=3500, font_size=50):
         screen.fill((0, 0, 0))
         text_surface.set_alpha(alpha)
         screen.blit(text_surface, text_rect)
-        pygame.display.flip()
+        render_backend.flip()
+        audio.update()
         clock.tick(30)
 
 def draw_slider(screen, x, y, width, height, value):
@@ -69,7 +74,7 @@ def show_config_screen(screen):
     font = pygame.font.Font(None, 40)
     options = ["Volumen", "Silenciar/Activar Sonido", "Pantalla Completa", "Volver"]
     selected_index = 0
-    volume = pygame.mixer.music.get_volume()
+    volume = audio.music.volume
     clock = pygame.time.Clock()
 
     # Posición para el slider de volumen
@@ -93,7 +98,7 @@ def show_config_screen(screen):
         for i, option in enumerate(options):
             display_text = option
             if option == "Silenciar/Activar Sonido":
-                display_text = "Silenciar" if pygame.mixer.music.get_volume() > 0 else "Activar Sonido"
+                display_text = "Activar Sonido" if audio.music.muted else "Silenciar"
             text_color = (255, 255, 0) if i == selected_index else (255, 255, 255)
             text_surface = font.render(display_text, True, text_color)
             text_rect = text_surface.get_rect(center=(screen.get_width() // 2,
@@ -101,7 +106,8 @@ def show_config_screen(screen):
             screen.blit(text_surface, text_rect)
             option_rects.append(text_rect)
 
-        pygame.display.flip()
+        render_backend.flip()
+        audio.update()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -118,22 +124,19 @@ def show_config_screen(screen):
                     if options[selected_index] == "Volumen":
                         pass  # No se realiza acción especial
                     elif options[selected_index] == "Silenciar/Activar Sonido":
-                        if pygame.mixer.music.get_volume() > 0:
-                            pygame.mixer.music.set_volume(0)
-                        else:
-                            pygame.mixer.music.set_volume(volume)
+                        audio.music.toggle_mute()
                     elif options[selected_index] == "Pantalla Completa":
-                        pygame.display.toggle_fullscreen()
+                        render_backend.toggle_fullscreen()
                     elif options[selected_index] == "Volver":
                         return
                 elif event.key == pygame.K_LEFT:
                     if options[selected_index] == "Volumen":
                         volume = max(0, volume - 0.05)
-                        pygame.mixer.music.set_volume(volume)
+                        audio.music.set_volume(volume)
                 elif event.key == pygame.K_RIGHT:
                     if options[selected_index] == "Volumen":
                         volume = min(1, volume + 0.05)
-                        pygame.mixer.music.set_volume(volume)
+                        audio.music.set_volume(volume)
 
             # Manejo de eventos de ratón
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -142,7 +145,7 @@ def show_config_screen(screen):
                 if (slider_x <= mouse_pos[0] <= slider_x + slider_width and
                         slider_y <= mouse_pos[1] <= slider_y + slider_height):
                     volume = (mouse_pos[0] - slider_x) / slider_width
-                    pygame.mixer.music.set_volume(volume)
+                    audio.music.set_volume(volume)
                 # Revisar si se hace clic sobre alguna opción
                 for i, rect in enumerate(option_rects):
                     if rect.collidepoint(mouse_pos):
@@ -150,12 +153,9 @@ def show_config_screen(screen):
                         if options[i] == "Volumen":
                             pass
                         elif options[i] == "Silenciar/Activar Sonido":
-                            if pygame.mixer.music.get_volume() > 0:
-                                pygame.mixer.music.set_volume(0)
-                            else:
-                                pygame.mixer.music.set_volume(volume)
+                            audio.music.toggle_mute()
                         elif options[i] == "Pantalla Completa":
-                            pygame.display.toggle_fullscreen()
+                            render_backend.toggle_fullscreen()
                         elif options[i] == "Volver":
                             return
 
@@ -178,7 +178,8 @@ def show_menu(screen, background):
             screen.blit(text_surface, text_rect)
             buttons_rects.append(text_rect)
 
-        pygame.display.flip()
+        render_backend.flip()
+        audio.update()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -209,7 +210,7 @@ def show_menu(screen, background):
         clock.tick(30)
 
 def fade_out(screen, duration):
-    fade_surface = pygame.Surface(screen.get_size()).convert()
+    fade_surface = render_backend.convert(pygame.Surface(screen.get_size()))
     fade_surface.fill((0, 0, 0))
     clock = pygame.time.Clock()
     alpha = 0
@@ -231,7 +232,8 @@ def fade_out(screen, duration):
 
         fade_surface.set_alpha(int(alpha))
         screen.blit(fade_surface, (0, 0))
-        pygame.display.flip()
+        render_backend.flip()
+        audio.update()
         clock.tick(60)
 
 def show_pause_menu(screen, background):
@@ -258,7 +260,8 @@ def show_pause_menu(screen, background):
             screen.blit(text_surface, text_rect)
             buttons_rects.append(text_rect)
 
-        pygame.display.flip()
+        render_backend.flip()
+        audio.update()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
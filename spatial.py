@@ -0,0 +1,433 @@
+# spatial.py
+"""
+Índices espaciales para las consultas de colisión.
+"""
+from bisect import bisect_right
+
+import pygame
+
+# Tamaño (en píxeles) de cada celda de la rejilla de colisiones estáticas
+COLLISION_CELL_SIZE = 128
+# Tamaño de celda de la rejilla dinámica de sprites (enemigos, consumibles)
+ENTITY_CELL_SIZE = 128
+
+_NO_CANDIDATES = ((), ())
+
+
+class SpatialHash:
+    """
+    Rejilla uniforme sobre los rectángulos estáticos del nivel. Se construye
+    una vez por nivel y responde "qué rectángulos se solapan con este AABB"
+    mirando sólo las celdas que toca, en vez de recorrer toda la lista.
+    """
+    def __init__(self, rects, cell_size=COLLISION_CELL_SIZE):
+        self.cell_size = cell_size
+        self.rects = [pygame.Rect(r) for r in rects]
+        # (celda_x, celda_y) -> ([índices], [rects]) en el orden de la lista original
+        self.cells = {}
+        # Candidatos ya calculados por bloque de celdas (izq, der, arriba, abajo)
+        self._span_cache = {}
+        for index, rect in enumerate(self.rects):
+            left, right, top, bottom = self._cell_span(rect)
+            for cy in range(top, bottom + 1):
+                for cx in range(left, right + 1):
+                    indices, cell_rects = self.cells.setdefault((cx, cy), ([], []))
+                    indices.append(index)
+                    cell_rects.append(rect)
+        # Límites de las celdas ocupadas: fuera de ellos no hay nada que buscar
+        if self.cells:
+            self._bounds = (min(c[0] for c in self.cells), max(c[0] for c in self.cells),
+                            min(c[1] for c in self.cells), max(c[1] for c in self.cells))
+        else:
+            self._bounds = (0, -1, 0, -1)
+
+    def _cell_span(self, rect):
+        """Celdas (izquierda, derecha, arriba, abajo) que toca el rect, inclusivas."""
+        size = self.cell_size
+        left = rect.left // size
+        top = rect.top // size
+        # right/bottom son exclusivos: el último píxel es right - 1
+        right = (rect.right - 1) // size if rect.width > 0 else left
+        bottom = (rect.bottom - 1) // size if rect.height > 0 else top
+        return left, right, top, bottom
+
+    def _candidates(self, rect):
+        """([índices], [rects]) de las celdas que toca 'rect', ordenados y sin repetir."""
+        # _cell_span en línea: se llama varias veces por entidad y frame
+        size = self.cell_size
+        x, y, w, h = rect
+        left = x // size
+        top = y // size
+        right = (x + w - 1) // size if w > 0 else left
+        bottom = (y + h - 1) // size if h > 0 else top
+        # Se recorta a las celdas ocupadas; así la caché no crece con cada
+        # posición de una entidad que cae fuera del mapa
+        min_x, max_x, min_y, max_y = self._bounds
+        if left < min_x:
+            left = min_x
+        if right > max_x:
+            right = max_x
+        if top < min_y:
+            top = min_y
+        if bottom > max_y:
+            bottom = max_y
+        if left > right or top > bottom:
+            return _NO_CANDIDATES
+        span = (left, right, top, bottom)
+        candidates = self._span_cache.get(span)
+        if candidates is not None:
+            return candidates
+
+        found = set()
+        for cy in range(top, bottom + 1):
+            for cx in range(left, right + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket[0])
+        indices = sorted(found)
+        candidates = (indices, [self.rects[i] for i in indices])
+        # La geometría es estática: el resultado de cada bloque de celdas no cambia
+        self._span_cache[span] = candidates
+        return candidates
+
+    def __iter__(self):
+        return iter(self.rects)
+
+    def __len__(self):
+        return len(self.rects)
+
+    def query(self, area):
+        """
+        Rectángulos que se solapan con 'area', en el mismo orden que la lista
+        original (así la resolución de colisiones da el mismo resultado).
+        """
+        area = pygame.Rect(area)
+        _, rects = self._candidates(area)
+        return [rects[i] for i in area.collidelistall(rects)]
+
+    def iter_colliding(self, rect):
+        """
+        Recorre, en el orden original, los rectángulos que chocan con 'rect'.
+        'rect' es el Rect de la entidad y puede moverse dentro del bucle: cada
+        paso vuelve a consultar la rejilla con la posición actual, así que el
+        resultado es idéntico a 'for r in rects: if rect.colliderect(r)'.
+        """
+        last = -1
+        while True:
+            indices, rects = self._candidates(rect)
+            start = bisect_right(indices, last)
+            hit = rect.collidelist(rects[start:] if start else rects)
+            if hit < 0:
+                return
+            last = indices[start + hit]
+            yield rects[start + hit]
+
+    def collides(self, area):
+        """True si 'area' se solapa con algún rectángulo."""
+        if not isinstance(area, pygame.Rect):
+            area = pygame.Rect(area)
+        return area.collidelist(self._candidates(area)[1]) >= 0
+
+    def sweep(self, rect, dx, dy):
+        """
+        Barrido continuo de 'rect' a lo largo de (dx, dy). Devuelve
+        (toi, normal, rect_golpeado): toi es la fracción del movimiento
+        (0..1) hasta el primer contacto y normal la del lado golpeado, p. ej.
+        (0, -1) al caer sobre un suelo. Sin contacto devuelve (1.0, (0, 0), None).
+
+        Los rectángulos con los que 'rect' ya se solapa al empezar se ignoran:
+        de esos se encarga la resolución por solapamiento de cada entidad.
+        """
+        return self._sweep(rect, dx, dy)[:3]
+
+    def _sweep(self, rect, dx, dy):
+        """sweep() más un cuarto valor: True si 'rect' ya se solapaba con algo al empezar."""
+        if dx == 0 and dy == 0:
+            return 1.0, (0, 0), None, self.collides(rect)
+        left, top, width, height = rect
+        right = left + width
+        bottom = top + height
+        # Zona que recorre el rect durante el movimiento (incluye el propio rect)
+        region = pygame.Rect(left + dx if dx < 0 else left, top + dy if dy < 0 else top,
+                             width + abs(dx), height + abs(dy))
+        _, candidates = self._candidates(region)
+        hits = region.collidelistall(candidates)
+        if not hits:
+            return 1.0, (0, 0), None, False
+
+        best_toi = 1.0
+        best_normal = (0, 0)
+        best_rect = None
+        embedded = False
+        for i in hits:
+            other = candidates[i]
+            if other.colliderect(rect):
+                embedded = True
+                continue
+
+            if dx > 0:
+                x_entry = (other.left - right) / dx
+                x_exit = (other.right - left) / dx
+            elif dx < 0:
+                x_entry = (other.right - left) / dx
+                x_exit = (other.left - right) / dx
+            elif left < other.right and other.left < right:
+                x_entry, x_exit = float("-inf"), float("inf")
+            else:
+                continue
+
+            if dy > 0:
+                y_entry = (other.top - bottom) / dy
+                y_exit = (other.bottom - top) / dy
+            elif dy < 0:
+                y_entry = (other.bottom - top) / dy
+                y_exit = (other.top - bottom) / dy
+            elif top < other.bottom and other.top < bottom:
+                y_entry, y_exit = float("-inf"), float("inf")
+            else:
+                continue
+
+            entry = max(x_entry, y_entry)
+            if entry < 0 or entry >= min(x_exit, y_exit) or entry > best_toi:
+                continue
+            if entry == best_toi and best_rect is not None:
+                # Empate: se queda el primero de la lista, como en la resolución por solapamiento
+                continue
+            best_toi = entry
+            best_rect = other
+            if x_entry > y_entry:
+                best_normal = (-1 if dx > 0 else 1, 0)
+            else:
+                best_normal = (0, -1 if dy > 0 else 1)
+        return best_toi, best_normal, best_rect, embedded
+
+    def move(self, rect, dx, dy):
+        """
+        Mueve 'rect' (en el sitio) hasta (dx, dy) o hasta el primer contacto,
+        sin atravesar geometría por rápido que vaya. Los desplazamientos
+        fraccionarios se redondean igual que al sumarlos a un Rect. Al
+        chocar no desliza: para eso se mueve cada eje por separado, como
+        hacen Player y Enemy.
+
+        Devuelve None si se movió sin tocar nada, o (normal, rect_golpeado,
+        ya_solapado): normal y rect son (0, 0) y None si no hubo contacto, y
+        ya_solapado indica que 'rect' empezó dentro de algún rectángulo, así
+        que la entidad debe resolver ese solapamiento por su cuenta.
+        """
+        x, y = rect.topleft
+        # Mismo redondeo que pygame al asignar una coordenada decimal a un Rect
+        # (mitades hacia fuera del 0)
+        target_x = x + dx
+        target_y = y + dy
+        step_x = (int(target_x + 0.5) if target_x >= 0 else -int(0.5 - target_x)) - x
+        step_y = (int(target_y + 0.5) if target_y >= 0 else -int(0.5 - target_y)) - y
+        toi, normal, hit, embedded = self._sweep(rect, step_x, step_y)
+        if hit is None:
+            rect.move_ip(step_x, step_y)
+            return ((0, 0), None, True) if embedded else None
+
+        # En el eje del contacto se queda pegado al lado golpeado; en el otro
+        # avanza la parte del movimiento anterior al impacto
+        if normal[0]:
+            rect.y += int(step_y * toi)
+            if normal[0] < 0:
+                rect.right = hit.left
+            else:
+                rect.left = hit.right
+        else:
+            rect.x += int(step_x * toi)
+            if normal[1] < 0:
+                rect.bottom = hit.top
+            else:
+                rect.top = hit.bottom
+        return normal, hit, embedded
+
+
+class SpriteGrid:
+    """
+    Broadphase dinámica para sprites que se mueven: una rejilla uniforme que
+    se mantiene entre frames. sync() sólo recoloca los sprites cuyo rect ha
+    cambiado de celdas y olvida los que ya no están en el grupo; query()
+    mira las celdas que toca un rect en lugar de recorrer todo el grupo.
+
+    Los resultados salen en el mismo orden en que se recorre el grupo, como
+    con pygame.sprite.spritecollide.
+    """
+    def __init__(self, group, cell_size=ENTITY_CELL_SIZE):
+        self.group = group
+        self.cell_size = cell_size
+        # (celda_x, celda_y) -> {sprite: None}
+        self.cells = {}
+        # sprite -> [orden de inserción, izquierda, derecha, arriba, abajo] (celdas ocupadas)
+        self.entries = {}
+        self._next_order = 0
+        self.sync()
+
+    def _place(self, sprite, left, right, top, bottom):
+        for cy in range(top, bottom + 1):
+            for cx in range(left, right + 1):
+                self.cells.setdefault((cx, cy), {})[sprite] = None
+
+    def _unplace(self, sprite, left, right, top, bottom):
+        for cy in range(top, bottom + 1):
+            for cx in range(left, right + 1):
+                cell = self.cells.get((cx, cy))
+                if cell is not None:
+                    cell.pop(sprite, None)
+                    if not cell:
+                        del self.cells[(cx, cy)]
+
+    def sync(self):
+        """Pone la rejilla al día con las posiciones y el contenido actuales del grupo."""
+        size = self.cell_size
+        members = self.group.spritedict
+        removed = []
+        for sprite, entry in self.entries.items():
+            if sprite not in members:
+                removed.append(sprite)
+                continue
+            x, y, w, h = sprite.rect
+            left = x // size
+            top = y // size
+            right = (x + w - 1) // size if w > 0 else left
+            bottom = (y + h - 1) // size if h > 0 else top
+            # Lo habitual es que el sprite siga en las mismas celdas
+            if left != entry[1] or right != entry[2] or top != entry[3] or bottom != entry[4]:
+                self._unplace(sprite, *entry[1:])
+                entry[1:] = left, right, top, bottom
+                self._place(sprite, left, right, top, bottom)
+
+        for sprite in removed:
+            self._unplace(sprite, *self.entries.pop(sprite)[1:])
+        if len(self.entries) != len(members):
+            for sprite in members:
+                if sprite not in self.entries:
+                    x, y, w, h = sprite.rect
+                    left = x // size
+                    top = y // size
+                    right = (x + w - 1) // size if w > 0 else left
+                    bottom = (y + h - 1) // size if h > 0 else top
+                    self.entries[sprite] = [self._next_order, left, right, top, bottom]
+                    self._next_order += 1
+                    self._place(sprite, left, right, top, bottom)
+
+    def sync_sprites(self, sprites):
+        """
+        Como sync(), pero sólo recoloca los sprites dados (los que se han
+        movido este tick). Los sprites eliminados del grupo se siguen
+        ignorando en query() hasta el próximo sync() completo.
+        """
+        size = self.cell_size
+        entries = self.entries
+        for sprite in sprites:
+            entry = entries.get(sprite)
+            if entry is None:
+                continue
+            x, y, w, h = sprite.rect
+            left = x // size
+            top = y // size
+            right = (x + w - 1) // size if w > 0 else left
+            bottom = (y + h - 1) // size if h > 0 else top
+            if left != entry[1] or right != entry[2] or top != entry[3] or bottom != entry[4]:
+                self._unplace(sprite, *entry[1:])
+                entry[1:] = left, right, top, bottom
+                self._place(sprite, left, right, top, bottom)
+
+    def query(self, rect):
+        """
+        Sprites del grupo cuyo rect se solapa con 'rect'. Las celdas son las
+        del último sync(), así que hay que llamarlo después de mover sprites.
+        """
+        size = self.cell_size
+        x, y, w, h = rect
+        left = x // size
+        top = y // size
+        right = (x + w - 1) // size if w > 0 else left
+        bottom = (y + h - 1) // size if h > 0 else top
+        members = self.group.spritedict
+        found = {}
+        for cy in range(top, bottom + 1):
+            for cx in range(left, right + 1):
+                cell = self.cells.get((cx, cy))
+                if cell:
+                    for sprite in cell:
+                        # Los sprites eliminados desde el último sync() se ignoran
+                        if sprite not in found and sprite in members and rect.colliderect(sprite.rect):
+                            found[sprite] = self.entries[sprite][0]
+        if len(found) < 2:
+            return list(found)
+        return sorted(found, key=found.get)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _merge_runs(entries, axis):
+    """
+    Une los rectángulos alineados en un eje: con axis=0, los que comparten
+    top/bottom y se tocan o solapan en horizontal; con axis=1, los que
+    comparten left/right y se tocan o solapan en vertical. Cada entrada es
+    (índice_original, rect); la unión conserva el menor índice.
+    """
+    groups = {}
+    for entry in entries:
+        rect = entry[1]
+        key = (rect.top, rect.bottom) if axis == 0 else (rect.left, rect.right)
+        groups.setdefault(key, []).append(entry)
+
+    merged = []
+    for group in groups.values():
+        if axis == 0:
+            group.sort(key=lambda e: (e[1].left, e[0]))
+        else:
+            group.sort(key=lambda e: (e[1].top, e[0]))
+        index, current = group[0][0], pygame.Rect(group[0][1])
+        for other_index, other in group[1:]:
+            if axis == 0:
+                touching = other.left <= current.right
+            else:
+                touching = other.top <= current.bottom
+            if touching:
+                current.union_ip(other)
+                index = min(index, other_index)
+            else:
+                merged.append((index, current))
+                index, current = other_index, pygame.Rect(other)
+        merged.append((index, current))
+    return merged
+
+
+def coalesce_rects(rects):
+    """
+    Reduce una lista de rectángulos a otra más corta que cubre exactamente la
+    misma área: descarta los que están contenidos en otro y une los contiguos
+    o solapados que comparten los dos bordes del otro eje. El resultado
+    mantiene el orden de la lista original (el del primer rect de cada unión).
+    Los rects sin área se dejan tal cual.
+    """
+    entries = []
+    degenerate = []
+    for index, rect in enumerate(rects):
+        rect = pygame.Rect(rect)
+        if rect.width > 0 and rect.height > 0:
+            entries.append((index, rect))
+        else:
+            degenerate.append((index, rect))
+
+    count = None
+    while count != len(entries):
+        count = len(entries)
+        # Los contenidos en otro rect no aportan área
+        entries.sort(key=lambda e: -e[1].width * e[1].height)
+        kept = []
+        for index, rect in entries:
+            for i, (kept_index, kept_rect) in enumerate(kept):
+                if kept_rect.contains(rect):
+                    kept[i] = (min(index, kept_index), kept_rect)
+                    break
+            else:
+                kept.append((index, rect))
+        entries = _merge_runs(_merge_runs(kept, 0), 1)
+
+    result = sorted(entries + degenerate, key=lambda e: e[0])
+    return [rect for _, rect in result]
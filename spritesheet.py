@@ -0,0 +1,70 @@
+# spritesheet.py
+"""
+Animaciones a partir de una sola hoja de sprites.
+
+La hoja se describe con un JSON junto a la imagen:
+    {"image": "hoja.png",
+     "frame_size": [ancho, alto],
+     "strips": {"correr": [columna, fila, frames], ...},
+     "animations": {"right": {"strip": "correr"},
+                    "left": {"strip": "correr", "mirror": true},
+                    "attack": {"strip": "ataque", "frames": [0, 1, 2]}}}
+
+Un "strip" son frames seguidos en una fila de la hoja. Cada animación toma
+los frames de un strip (todos o los de "frames", por su número dentro del
+strip). Los frames son subsurfaces: vistas de la hoja que no copian
+píxeles. Las animaciones con "mirror" usan esos mismos frames y están en
+SpriteSheet.mirrored: se reflejan en horizontal al dibujarlas (ver
+render_backend.blit_mirrored), así que no ocupan memoria aparte.
+"""
+import json
+import os
+
+import pygame
+
+import render_backend
+
+
+def _load_image(path, alpha):
+    return render_backend.convert(pygame.image.load(path), alpha=alpha)
+
+
+def sheet_image_path(meta_path):
+    """Ruta de la imagen de la hoja descrita en 'meta_path'."""
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    return os.path.join(os.path.dirname(meta_path), meta["image"])
+
+
+class SpriteSheet:
+    """
+    'load_image(ruta, alpha)' carga la imagen de la hoja ya convertida; por
+    defecto la decodifica del archivo (asset_cache pasa la suya, que mira
+    antes en el paquete de asset_bundle.py).
+    """
+    def __init__(self, meta_path, alpha=True, load_image=_load_image):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        image_path = os.path.join(os.path.dirname(meta_path), meta["image"])
+        self.image = load_image(image_path, alpha)
+        self.frame_width, self.frame_height = meta["frame_size"]
+        self.strips = {name: tuple(strip) for name, strip in meta["strips"].items()}
+
+        self.animations = {}
+        # Animaciones que se dibujan reflejadas en horizontal
+        self.mirrored = frozenset(name for name, animation in meta["animations"].items()
+                                  if animation.get("mirror", False))
+        for name, animation in meta["animations"].items():
+            self.animations[name] = self._frames(animation["strip"], animation.get("frames"))
+
+    def _frames(self, strip_name, indices):
+        column, row, count = self.strips[strip_name]
+        w, h = self.frame_width, self.frame_height
+        if indices is None:
+            indices = range(count)
+        return [self.image.subsurface(((column + i) * w, row * h, w, h)) for i in indices]
+
+    @property
+    def nbytes(self):
+        """Bytes de píxeles de la hoja (los frames y las animaciones reflejadas no ocupan más)."""
+        return self.image.get_pitch() * self.image.get_height()
@@ -0,0 +1,94 @@
+# Caché de niveles (level_cache.py) con propiedades sin tipo, que Tiled guarda como texto
+import level_cache
+
+TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<map version="1.10" orientation="orthogonal" renderorder="right-down" width="4" height="2" tilewidth="32" tileheight="32" infinite="0" nextlayerid="4" nextobjectid="4">
+ <layer id="1" name="Suelo" width="4" height="2">
+  <data encoding="csv">
+0,0,0,0,
+0,0,0,0
+</data>
+ </layer>
+ <objectgroup id="2" name="Enemies">
+  <object id="1" name="Wolf" type="enemy" x="10" y="20" width="32" height="32">
+   <properties>
+    <property name="enemy_health" value="%(health)s"/>
+    <property name="enemy_speed" value="1.5"/>
+    <property name="enemy_type" value="wolf"/>
+   </properties>
+  </object>
+ </objectgroup>
+ <objectgroup id="3" name="Consumables">
+  <object id="2" name="Fish" type="consumable" x="30" y="40" width="32" height="32">
+   <properties>
+    <property name="consumable_type" value="fish"/>
+    <property name="health_value" value="50"/>
+    <property name="pickup_sound" value=""/>
+   </properties>
+  </object>
+ </objectgroup>
+</map>
+"""
+
+
+def write_map(tmp_path, health="100"):
+    path = tmp_path / "nivel.tmx"
+    path.write_text(TMX % {"health": health}, encoding="utf-8")
+    return str(path)
+
+
+def test_string_properties_round_trip(tmp_path):
+    tmx_path = write_map(tmp_path)
+    compiled = level_cache.compile_level(tmx_path)
+    assert compiled["enemy_spawns"][0]["health"] == 100
+    assert compiled["enemy_spawns"][0]["speed"] == 1.5
+    assert compiled["consumable_spawns"][0]["health_value"] == 50
+
+    level_cache.write_cache(level_cache.cache_path_for(tmx_path), compiled)
+    assert level_cache.read_cache(level_cache.cache_path_for(tmx_path)) == compiled
+
+    level = level_cache.load_level(tmx_path, load_images=False)
+    assert level.enemy_spawns == compiled["enemy_spawns"]
+    assert level.consumable_spawns == compiled["consumable_spawns"]
+
+
+def test_unencodable_property_loads_without_cache(tmp_path):
+    tmx_path = write_map(tmp_path, health="mucha")
+    level = level_cache.load_level(tmx_path, load_images=False)
+    assert level.enemy_spawns[0]["health"] == "mucha"
+    assert not (tmp_path / "nivel.tmx.lvlc").exists()
+
+
+TILESET_TMX = """<?xml version="1.0" encoding="UTF-8"?>
+<map version="1.10" orientation="orthogonal" renderorder="right-down" width="1" height="1" tilewidth="32" tileheight="32" infinite="0" nextlayerid="2" nextobjectid="1">
+ <tileset firstgid="1" name="clave" tilewidth="32" tileheight="32" tilecount="1" columns="1">
+  <image source="clave.png" trans="ff00ff" width="32" height="32"/>
+ </tileset>
+ <layer id="1" name="Suelo" width="1" height="1">
+  <data encoding="csv">
+1
+</data>
+ </layer>
+</map>
+"""
+
+
+def test_tileset_trans_is_colorkey(tmp_path):
+    import pygame
+
+    # Mitad magenta (el color 'trans'), mitad roja
+    image = pygame.Surface((32, 32))
+    image.fill((255, 0, 255))
+    image.fill((255, 0, 0), (0, 0, 16, 32))
+    pygame.image.save(image, str(tmp_path / "clave.png"))
+    tmx_path = tmp_path / "clave.tmx"
+    tmx_path.write_text(TILESET_TMX, encoding="utf-8")
+
+    for _ in range(2):  # compilado y desde la caché
+        level = level_cache.load_level(str(tmx_path))
+        tile = level.get_tile_image_by_gid(1)
+        canvas = pygame.Surface((32, 32))
+        canvas.fill((0, 0, 255))
+        canvas.blit(tile, (0, 0))
+        assert canvas.get_at((4, 4))[:3] == (255, 0, 0)
+        assert canvas.get_at((24, 4))[:3] == (0, 0, 255)
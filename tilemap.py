@@ -1,83 +1,507 @@
 # tilemap.py actualizado
 import pygame
-import pytmx
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 
-def load_map(tmx_path):
-    return pytmx.load_pygame(tmx_path)
+from level_cache import load_level
+from spatial import SpatialHash
 
-def draw_tiled_map(screen, tmx_data, camera_x=0, camera_y=0):
-    for layer in tmx_data.visible_layers:
-        if hasattr(layer, 'data'):
-            for x, y, gid in layer:
-                tile = tmx_data.get_tile_image_by_gid(gid)
-                if tile:
-                    world_x = x * tmx_data.tilewidth
-                    world_y = y * tmx_data.tileheight
+class TileLayer:
+    """
+    Capa de tiles ya resuelta: rejilla [fila][columna] con la región del atlas
+    de cada celda, (página, rect), o None si la celda está vacía.
+    """
+    def __init__(self, name, grid, properties=None, parallax_x=1.0, parallax_y=1.0):
+        self.name = name
+        self.grid = grid
+        self.properties = properties or {}
+        # Capas decorativas marcadas en Tiled con la propiedad "background"
+        self.background = bool(self.properties.get("background", False))
+        self.parallax_x = parallax_x
+        self.parallax_y = parallax_y
+        # Celdas animadas por fila: {fila: ([columnas ordenadas], [AnimatedTile])}.
+        # No están en 'grid', así que los chunks no las incluyen.
+        self.animated_rows = {}
 
-                    screen_x = world_x - camera_x
-                    screen_y = world_y - camera_y
 
-                    screen.blit(tile, (screen_x, screen_y))
-                    
+class AnimatedTile:
+    """
+    Línea de tiempo de un tile animado, resuelta al cargar: la región del atlas
+    de cada frame y el instante (ms) en que termina cada uno dentro del ciclo.
+    """
+    def __init__(self, frames):
+        self.regions = []
+        self.ends = []
+        total = 0
+        for region, duration in frames:
+            total += max(0, duration)
+            self.regions.append(region)
+            self.ends.append(total)
+        self.total = total
+
+    def region_at(self, time_ms):
+        if self.total <= 0:
+            return self.regions[0]
+        return self.regions[bisect_right(self.ends, time_ms % self.total)]
+
+
+class SolidGrid:
+    """
+    Rejilla de solidez a resolución de tile, rasterizada desde la capa
+    "Collisions": una celda es sólida si algún rectángulo de colisión la
+    toca. Sirve para rayos y línea de visión sin recorrer los rectángulos.
+    Fuera del mapa todo se considera vacío.
+    """
+    def __init__(self, rects, width, height, tile_width, tile_height):
+        self.width = width
+        self.height = height
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        # Una celda por byte, fila a fila: 1 = sólida
+        self.cells = bytearray(width * height)
+        for rect in rects:
+            if rect.width <= 0 or rect.height <= 0:
+                continue
+            col_start = max(0, rect.left // tile_width)
+            col_end = min(width, (rect.right - 1) // tile_width + 1)
+            row_start = max(0, rect.top // tile_height)
+            row_end = min(height, (rect.bottom - 1) // tile_height + 1)
+            if col_start >= col_end:
+                continue
+            run = b"\x01" * (col_end - col_start)
+            for y in range(row_start, row_end):
+                self.cells[y * width + col_start:y * width + col_end] = run
+
+    def is_solid(self, tile_x, tile_y):
+        if 0 <= tile_x < self.width and 0 <= tile_y < self.height:
+            return self.cells[tile_y * self.width + tile_x] == 1
+        return False
+
+    def solid_at(self, x, y):
+        """True si el punto (en píxeles) cae en una celda sólida."""
+        return self.is_solid(int(x // self.tile_width), int(y // self.tile_height))
+
+    def raycast(self, start, end):
+        """
+        Recorre las celdas del segmento start -> end (DDA de Amanatides-Woo) y
+        devuelve (x, y, tile_x, tile_y) del primer punto sólido, o None si el
+        segmento está despejado. Si 'start' ya está dentro de una celda
+        sólida, el impacto es el propio 'start'.
+        """
+        x0, y0 = start
+        x1, y1 = end
+        tw = self.tile_width
+        th = self.tile_height
+        width = self.width
+        height = self.height
+        cells = self.cells
+
+        tile_x = int(x0 // tw)
+        tile_y = int(y0 // th)
+        if 0 <= tile_x < width and 0 <= tile_y < height and cells[tile_y * width + tile_x]:
+            return x0, y0, tile_x, tile_y
+
+        dx = x1 - x0
+        dy = y1 - y0
+        # t (0..1 a lo largo del segmento) de la siguiente frontera de celda en cada eje
+        if dx > 0:
+            step_x = 1
+            t_delta_x = tw / dx
+            t_max_x = ((tile_x + 1) * tw - x0) / dx
+        elif dx < 0:
+            step_x = -1
+            t_delta_x = -tw / dx
+            t_max_x = (tile_x * tw - x0) / dx
+        else:
+            step_x = 0
+            t_delta_x = t_max_x = float("inf")
+        if dy > 0:
+            step_y = 1
+            t_delta_y = th / dy
+            t_max_y = ((tile_y + 1) * th - y0) / dy
+        elif dy < 0:
+            step_y = -1
+            t_delta_y = -th / dy
+            t_max_y = (tile_y * th - y0) / dy
+        else:
+            step_y = 0
+            t_delta_y = t_max_y = float("inf")
+
+        # Número exacto de celdas que cruza el segmento después de la inicial
+        steps = abs(int(x1 // tw) - tile_x) + abs(int(y1 // th) - tile_y)
+        for _ in range(steps):
+            if t_max_x < t_max_y:
+                tile_x += step_x
+                t = t_max_x
+                t_max_x += t_delta_x
+            else:
+                tile_y += step_y
+                t = t_max_y
+                t_max_y += t_delta_y
+            if 0 <= tile_x < width and 0 <= tile_y < height and cells[tile_y * width + tile_x]:
+                return x0 + dx * t, y0 + dy * t, tile_x, tile_y
+        return None
+
+    def line_of_sight(self, start, end):
+        """True si no hay ninguna celda sólida entre los dos puntos."""
+        return self.raycast(start, end) is None
+
+
+# Tamaño (en píxeles) de los trozos pre-renderizados y memoria máxima de la caché
+CHUNK_SIZE = 512
+CHUNK_MEMORY_BUDGET = 32 * 1024 * 1024
+# Parte de ese presupuesto que pueden ocupar las capas de fondo horneadas enteras
+BACKGROUND_BAKE_SHARE = 0.75
+
+
+def load_map(tmx_path, chunk_size=CHUNK_SIZE, chunk_memory_budget=CHUNK_MEMORY_BUDGET, graphics=True):
+    """
+    Carga el nivel desde su caché compilada (ver level_cache.py) y prepara el
+    renderizado. Devuelve un LevelData. Con graphics=False (simulación sin
+    pantalla) no se cargan imágenes y el mapa no se puede dibujar.
+    """
+    tmx_data = load_level(tmx_path, load_images=graphics)
+    if graphics:
+        # Las capas son estáticas (salvo los tiles animados): se resuelven una sola vez al cargar
+        tmx_data.tile_layers = prepare_tile_layers(tmx_data)
+        tmx_data.chunk_cache = ChunkCache(tmx_data, chunk_size, chunk_memory_budget)
+        tmx_data.chunk_cache.bake_backgrounds()
+    else:
+        tmx_data.tile_layers = []
+        tmx_data.chunk_cache = None
+    tmx_data.collision_index = SpatialHash(tmx_data.collision_rects)
+    tmx_data.solid_grid = SolidGrid(
+        tmx_data.collision_rects, tmx_data.width, tmx_data.height,
+        tmx_data.tilewidth, tmx_data.tileheight
+    )
+    return tmx_data
+
+def prepare_tile_layers(tmx_data):
+    """
+    Recorre una sola vez las capas de tiles visibles y guarda, para cada celda,
+    la región del atlas ya resuelta (None si la celda está vacía). Así el
+    dibujado no necesita consultar get_tile_image_by_gid en cada frame.
+    """
+    if tmx_data.tile_regions is None:
+        tmx_data.load_images()
+    regions = tmx_data.tile_regions
+    animated_tiles = tmx_data.animated_tiles = prepare_animated_tiles(tmx_data)
+
+    tile_layers = []
+    for layer in tmx_data.layers:
+        if not layer.visible:
+            continue
+        gids = layer.gids
+        width = layer.width
+        grid = [
+            [regions[gid] for gid in gids[y * width:(y + 1) * width]]
+            for y in range(layer.height)
+        ]
+        tile_layer = TileLayer(
+            layer.name, grid, layer.properties, layer.parallax_x, layer.parallax_y
+        )
+        if animated_tiles:
+            for y in range(layer.height):
+                columns = []
+                timelines = []
+                for x in range(width):
+                    animated = animated_tiles.get(gids[y * width + x])
+                    if animated is not None:
+                        grid[y][x] = None
+                        columns.append(x)
+                        timelines.append(animated)
+                if columns:
+                    tile_layer.animated_rows[y] = (columns, timelines)
+        tile_layers.append(tile_layer)
+    return tile_layers
+
+def prepare_animated_tiles(tmx_data):
+    """gid -> AnimatedTile para cada tile animado del nivel."""
+    regions = tmx_data.tile_regions
+    animated_tiles = {}
+    for gid, frames in tmx_data.animations.items():
+        frames = [(regions[frame_gid], duration) for frame_gid, duration in frames
+                  if regions[frame_gid] is not None]
+        if frames:
+            animated_tiles[gid] = AnimatedTile(frames)
+    return animated_tiles
+
+def convert_layer_surface(surface, layer, tile_range):
+    """
+    Pasa una superficie pre-renderizada al formato de pantalla. Si todas las
+    celdas del rango tienen un tile opaco se descarta el canal alfa, porque
+    así se copia mucho más rápido; basta con mirar los tiles, no los píxeles.
+    """
+    if pygame.display.get_surface() is None:
+        return surface
+    col_start, col_end, row_start, row_end = tile_range
+    for y in range(row_start, row_end):
+        for tile in layer.grid[y][col_start:col_end]:
+            if tile is None or tile[0].get_flags() & pygame.SRCALPHA:
+                return surface.convert_alpha()
+    return surface.convert()
+
+def draw_background_layer(screen, chunk_cache, layer_index, camera_x=0, camera_y=0):
+    """
+    Dibuja una capa de fondo aplicando su factor de parallax: un solo blit si
+    está horneada (ver ChunkCache.bake_backgrounds), si no sus chunks vistos
+    desde la cámara desplazada. Devuelve el número de blits.
+    """
+    layer = chunk_cache.tmx_data.tile_layers[layer_index]
+    offset_x = int(camera_x * layer.parallax_x)
+    offset_y = int(camera_y * layer.parallax_y)
+    baked = chunk_cache.baked.get(layer_index)
+    if baked is None:
+        return chunk_cache.draw_layer(screen, layer_index, offset_x, offset_y)
+    screen.blit(baked, (-offset_x, -offset_y))
+    return 1
+
+def draw_animated_tiles(screen, tmx_data, layer, camera_x, camera_y, time_ms):
+    """
+    Dibuja encima de la capa sólo las celdas animadas que están en la vista.
+    El frame de cada animación se calcula una vez por llamada, no por celda.
+    """
+    if not layer.animated_rows:
+        return 0
+    tw = tmx_data.tilewidth
+    th = tmx_data.tileheight
+    offset_x = int(camera_x * layer.parallax_x)
+    offset_y = int(camera_y * layer.parallax_y)
+    col_start, col_end, row_start, row_end = visible_tile_range(
+        tmx_data, offset_x, offset_y, screen.get_width(), screen.get_height()
+    )
+    current = {}
+    batch = []
+    for y in range(row_start, row_end):
+        row = layer.animated_rows.get(y)
+        if row is None:
+            continue
+        columns, timelines = row
+        dest_y = y * th - offset_y
+        for i in range(bisect_left(columns, col_start), bisect_left(columns, col_end)):
+            animated = timelines[i]
+            region = current.get(animated)
+            if region is None:
+                region = current[animated] = animated.region_at(time_ms)
+            batch.append((region[0], (columns[i] * tw - offset_x, dest_y), region[1]))
+    if batch:
+        screen.blits(batch, doreturn=False)
+    return len(batch)
+
+def visible_tile_range(tmx_data, camera_x, camera_y, view_width, view_height):
+    """
+    Devuelve (col_inicio, col_fin, fila_inicio, fila_fin) de las celdas que
+    caen dentro de la vista. Los finales son exclusivos y están limitados al mapa.
+    """
+    tw = tmx_data.tilewidth
+    th = tmx_data.tileheight
+    col_start = max(0, int(camera_x // tw))
+    row_start = max(0, int(camera_y // th))
+    col_end = min(tmx_data.width, int(-(-(camera_x + view_width) // tw)))
+    row_end = min(tmx_data.height, int(-(-(camera_y + view_height) // th)))
+    return col_start, col_end, row_start, row_end
+
+def blit_tile_range(target, tmx_data, layer, tile_range, offset_x, offset_y):
+    """
+    Dibuja en 'target' las celdas de 'layer' dentro de tile_range, desplazadas
+    por (offset_x, offset_y), en un único Surface.blits con el área de cada
+    tile dentro de su atlas. Devuelve cuántos tiles se han dibujado.
+    """
+    tw = tmx_data.tilewidth
+    th = tmx_data.tileheight
+    col_start, col_end, row_start, row_end = tile_range
+    batch = []
+    for y in range(row_start, row_end):
+        row = layer.grid[y]
+        dest_y = y * th - offset_y
+        for x in range(col_start, col_end):
+            tile = row[x]
+            if tile:
+                batch.append((tile[0], (x * tw - offset_x, dest_y), tile[1]))
+    if batch:
+        target.blits(batch, doreturn=False)
+    return len(batch)
+
+
+class ChunkCache:
+    """
+    Caché LRU de trozos pre-renderizados de cada capa de tiles.
+
+    Cada chunk (chunk_size x chunk_size píxeles) se dibuja la primera vez que
+    entra en la vista y después se reutiliza, de modo que cada frame sólo
+    cuesta un blit por chunk visible y capa. Si la memoria usada supera
+    memory_budget se descartan los chunks menos usados recientemente.
+
+    Las capas de fondo pueden hornearse enteras en una superficie por capa
+    (bake_backgrounds); esa memoria se descuenta del presupuesto de los chunks.
+    """
+    def __init__(self, tmx_data, chunk_size=CHUNK_SIZE, memory_budget=CHUNK_MEMORY_BUDGET):
+        self.tmx_data = tmx_data
+        self.chunk_size = chunk_size
+        self.memory_budget = memory_budget
+        self.map_width = tmx_data.width * tmx_data.tilewidth
+        self.map_height = tmx_data.height * tmx_data.tileheight
+
+        # (índice_capa, cx, cy) -> Surface, o None si el chunk está vacío
+        self.chunks = OrderedDict()
+        self.memory_used = 0
+        # índice_capa -> superficie con la capa de fondo entera
+        self.baked = {}
+        self.baked_memory = 0
+
+        # Estadísticas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.blits_last_frame = 0
+
+    def _render_chunk(self, layer, cx, cy):
+        """Pre-renderiza un chunk de la capa; devuelve None si no tiene tiles."""
+        size = self.chunk_size
+        x0 = cx * size
+        y0 = cy * size
+        return self._render_area(layer, x0, y0, min(size, self.map_width - x0),
+                                 min(size, self.map_height - y0))
+
+    def _render_area(self, layer, x0, y0, width, height):
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        tile_range = visible_tile_range(self.tmx_data, x0, y0, width, height)
+        if not blit_tile_range(surface, self.tmx_data, layer, tile_range, x0, y0):
+            return None
+        return convert_layer_surface(surface, layer, tile_range)
+
+    def get_chunk(self, layer_index, cx, cy):
+        key = (layer_index, cx, cy)
+        if key in self.chunks:
+            self.hits += 1
+            self.chunks.move_to_end(key)
+            return self.chunks[key]
+
+        self.misses += 1
+        layer = self.tmx_data.tile_layers[layer_index]
+        chunk = self._render_chunk(layer, cx, cy)
+        self.chunks[key] = chunk
+        if chunk is not None:
+            self.memory_used += chunk.get_width() * chunk.get_height() * chunk.get_bytesize()
+            self._evict(keep=key)
+        return chunk
+
+    def bake_backgrounds(self, share=BACKGROUND_BAKE_SHARE):
+        """
+        Hornea cada capa de fondo en una sola superficie del tamaño del mapa,
+        en orden, mientras quepan en 'share' del presupuesto de memoria; las
+        que no caben se siguen dibujando por chunks. Devuelve cuántas se hornearon.
+        """
+        limit = self.memory_budget * share
+        # Una superficie de pantalla (o SRCALPHA) ocupa 4 bytes por píxel
+        size = self.map_width * self.map_height * 4
+        for layer_index, layer in enumerate(self.tmx_data.tile_layers):
+            if not layer.background or layer_index in self.baked:
+                continue
+            if self.baked_memory + size > limit:
+                continue
+            surface = self._render_area(layer, 0, 0, self.map_width, self.map_height)
+            if surface is None:
+                continue
+            self.baked[layer_index] = surface
+            self.baked_memory += surface.get_width() * surface.get_height() * surface.get_bytesize()
+        self._evict(keep=None)
+        return len(self.baked)
+
+    def _evict(self, keep):
+        """Descarta los chunks más antiguos hasta volver al presupuesto de memoria."""
+        while self.memory_used + self.baked_memory > self.memory_budget and len(self.chunks) > 1:
+            key, chunk = next(iter(self.chunks.items()))
+            if key == keep:
+                break
+            del self.chunks[key]
+            if chunk is not None:
+                self.memory_used -= chunk.get_width() * chunk.get_height() * chunk.get_bytesize()
+                self.evictions += 1
+
+    def clear(self):
+        self.chunks.clear()
+        self.memory_used = 0
+
+    def visible_chunk_range(self, camera_x, camera_y, view_width, view_height):
+        size = self.chunk_size
+        cx_start = max(0, int(camera_x // size))
+        cy_start = max(0, int(camera_y // size))
+        cx_end = min(-(-self.map_width // size), int(-(-(camera_x + view_width) // size)))
+        cy_end = min(-(-self.map_height // size), int(-(-(camera_y + view_height) // size)))
+        return cx_start, cx_end, cy_start, cy_end
+
+    def draw_layer(self, screen, layer_index, camera_x=0, camera_y=0):
+        """Dibuja los chunks visibles de una capa. Devuelve el número de blits."""
+        size = self.chunk_size
+        cx_start, cx_end, cy_start, cy_end = self.visible_chunk_range(
+            camera_x, camera_y, screen.get_width(), screen.get_height()
+        )
+        blits = 0
+        for cy in range(cy_start, cy_end):
+            for cx in range(cx_start, cx_end):
+                chunk = self.get_chunk(layer_index, cx, cy)
+                if chunk is not None:
+                    screen.blit(chunk, (cx * size - camera_x, cy * size - camera_y))
+                    blits += 1
+        return blits
+
+
+def draw_tiled_map(screen, tmx_data, camera_x=0, camera_y=0, time_ms=None):
+    """
+    Dibuja el mapa respetando el orden de las capas, todas desde la caché de
+    chunks salvo las de fondo horneadas; las de fondo, desplazadas según su parallax.
+    Encima de cada capa se dibujan sus tiles animados visibles en el instante
+    time_ms (por defecto, pygame.time.get_ticks()).
+    """
+    if time_ms is None:
+        time_ms = pygame.time.get_ticks()
+    chunk_cache = getattr(tmx_data, "chunk_cache", None)
+    if chunk_cache is None:
+        if getattr(tmx_data, "tile_layers", None) is None:
+            tmx_data.tile_layers = prepare_tile_layers(tmx_data)
+        chunk_cache = tmx_data.chunk_cache = ChunkCache(tmx_data)
+        chunk_cache.bake_backgrounds()
+
+    blits = 0
+    for layer_index, layer in enumerate(tmx_data.tile_layers):
+        if layer.background:
+            blits += draw_background_layer(screen, chunk_cache, layer_index, camera_x, camera_y)
+        else:
+            blits += chunk_cache.draw_layer(screen, layer_index, camera_x, camera_y)
+        blits += draw_animated_tiles(screen, tmx_data, layer, camera_x, camera_y, time_ms)
+    chunk_cache.blits_last_frame = blits
+
+# Accesores del nivel compilado (los datos se extraen una sola vez en level_cache.py)
+
 def get_player_spawn(tmx_data):
-    for obj in tmx_data.objects:
-        if obj.name == "PlayerSpawn":
-            return int(obj.x), int(obj.y)
-    return 0, 0
+    return tmx_data.player_spawn
 
 def get_collision_rects(tmx_data):
-    collision_rects = []
+    return tmx_data.collision_rects
 
-    # Recorre TODAS las capas del mapa
-    for layer in tmx_data.layers:
-        # Verifica si esta capa es del tipo 'TiledObjectGroup'
-        if isinstance(layer, pytmx.TiledObjectGroup):
-            # (Opcional) Solo si el nombre de la capa es "Collisions":
-            if layer.name == "Collisions":
-                # Recorre cada objeto en esa capa
-                for obj in layer:
-                    # Crea rectángulos de pygame a partir de la posición y tamaño
-                    rect = pygame.Rect(obj.x, obj.y, obj.width, obj.height)
-                    collision_rects.append(rect)
+def get_collision_stats(tmx_data):
+    """(rects en el TMX, rects tras unirlos al compilar el nivel)."""
+    return tmx_data.source_collision_count, len(tmx_data.collision_rects)
+
+def get_collision_index(tmx_data):
+    return tmx_data.collision_index
+
+def get_solid_grid(tmx_data):
+    return tmx_data.solid_grid
 
-    return collision_rects
+def raycast(tmx_data, start, end):
+    """Primer punto sólido entre start y end: (x, y, tile_x, tile_y) o None."""
+    return tmx_data.solid_grid.raycast(start, end)
 
-# tilemap.py (continuación)
+def has_line_of_sight(tmx_data, start, end):
+    return tmx_data.solid_grid.line_of_sight(start, end)
 
 def get_enemy_spawns(tmx_data):
-    enemies = []
-    for layer in tmx_data.layers:
-        if isinstance(layer, pytmx.TiledObjectGroup) and layer.name == "Enemies":
-            for obj in layer:
-                if obj.type == "enemy":
-                    enemies.append({
-                        "x": obj.x,
-                        "y": obj.y,
-                        "type": obj.properties.get("enemy_type", "wolf"),
-                        "speed": obj.properties.get("enemy_speed", 2),
-                        "health": obj.properties.get("enemy_health", 100)
-                    })
-    return enemies
+    return tmx_data.enemy_spawns
 
 def get_consumable_spawns(tmx_data):
-    consumables = []
-    for layer in tmx_data.layers:
-        if isinstance(layer, pytmx.TiledObjectGroup) and layer.name == "Consumables":
-            for obj in layer:
-                if obj.type == "consumable":
-                    consumables.append({
-                        "x": obj.x,
-                        "y": obj.y,
-                        "consumable_type": obj.properties.get("consumable_type", "fish"),
-                        "health_value": obj.properties.get("health_value", 50),
-                        "pickup_sound": obj.properties.get("pickup_sound", None)  # Opcional
-                    })
-    return consumables
+    return tmx_data.consumable_spawns
 
 def get_level_end(tmx_data):
-    for layer in tmx_data.layers:
-        if isinstance(layer, pytmx.TiledObjectGroup) and layer.name == "LevelEnd":
-            for obj in layer:
-                if obj.name == "LevelEnd":
-                    return pygame.Rect(obj.x, obj.y, obj.width, obj.height)
-    return None
+    return tmx_data.level_end
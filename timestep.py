@@ -0,0 +1,86 @@
+# timestep.py
+"""
+Paso fijo de simulación.
+
+La lógica del juego avanza en ticks de duración fija (SIM_RATE por segundo)
+y el dibujado va a su ritmo: en cada frame se ejecutan los ticks que caben
+en el tiempo real transcurrido y las posiciones se interpolan entre el tick
+anterior y el actual. Así el juego se comporta igual a 30, 60 o 144 fps.
+"""
+
+# Ticks de simulación por segundo
+SIM_RATE = 60
+# Máximo de ticks por frame: tras un parón (carga, ventana arrastrada...) no
+# se intenta recuperar todo el tiempo perdido de golpe
+MAX_STEPS_PER_FRAME = 5
+
+
+class SimulationClock:
+    """
+    Reloj de la simulación: sólo avanza con los ticks, nunca con el reloj
+    de pared. Todos los temporizadores del juego (ataque, invulnerabilidad,
+    muerte...) deben medirse con él, en ticks: se guarda el tick en que
+    empiezan y se compara con ticks_for(duración). Comparar segundos en
+    coma flotante (ticks * dt) haría que un mismo intervalo durase a veces
+    un tick más según el tick de partida.
+    """
+    def __init__(self, rate=SIM_RATE):
+        self.rate = rate
+        self.dt = 1.0 / rate
+        self.ticks = 0
+
+    @property
+    def time(self):
+        """Segundos de simulación transcurridos."""
+        return self.ticks * self.dt
+
+    def ticks_for(self, seconds):
+        """Duración en segundos convertida a ticks (redondeada al más cercano)."""
+        return round(seconds * self.rate)
+
+    @property
+    def time_ms(self):
+        return self.ticks * 1000 // self.rate
+
+    def step(self):
+        self.ticks += 1
+
+
+class FixedTimestep:
+    """Acumulador de tiempo real que decide cuántos ticks toca ejecutar en cada frame."""
+    def __init__(self, clock, max_steps=MAX_STEPS_PER_FRAME):
+        self.clock = clock
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, frame_seconds):
+        """Suma el tiempo real del frame y devuelve el número de ticks a ejecutar."""
+        self.accumulator += frame_seconds
+        dt = self.clock.dt
+        steps = int(self.accumulator // dt)
+        if steps > self.max_steps:
+            # Se descarta el tiempo que no da tiempo a simular
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * dt
+        return steps
+
+    def reset(self):
+        """Olvida el tiempo acumulado (p. ej. al volver de un menú o un diálogo)."""
+        self.accumulator = 0.0
+
+    @property
+    def alpha(self):
+        """Fracción (0..1) del siguiente tick ya transcurrida, para interpolar al dibujar."""
+        return min(1.0, self.accumulator / self.clock.dt)
+
+
+def interpolate_rect(rect, previous_topleft, alpha):
+    """Copia de 'rect' situada entre 'previous_topleft' (alpha=0) y su posición actual (alpha=1)."""
+    if previous_topleft is None or alpha >= 1.0:
+        return rect.copy()
+    x0, y0 = previous_topleft
+    result = rect.copy()
+    result.topleft = (round(x0 + (rect.x - x0) * alpha), round(y0 + (rect.y - y0) * alpha))
+    return result